@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 
 import argparse
+import atexit
 
 import json_fetcher
-from fetch import fetch_items
-from filter import filter_items
+import json_stream
+from format import clean_name_cache_info
+from name_set import NameSet
 from prints import main_menu
 
 # ----------------------- Data Structures -----------------------
@@ -17,26 +19,30 @@ sentinel_and_companion_name = {}
 
 # Inventory data
 warframe_inventory = dict()
+part_counts = {}
+
+# Mastered item uniqueNames (XPInfo)
+mastered_item_paths = set()
 
 # Separate Mastered
-mastered_or_owned_warframes = set()
-mastered_or_owned_primaries = set()
-mastered_or_owned_secondaries = set()
-mastered_or_owned_melees = set()
-mastered_or_owned_amps = set()
-mastered_or_owned_arch_weapons = set()
-mastered_or_owned_sentinels_and_companions = set()
-mastered_or_owned_others = set()
+mastered_or_owned_warframes = NameSet()
+mastered_or_owned_primaries = NameSet()
+mastered_or_owned_secondaries = NameSet()
+mastered_or_owned_melees = NameSet()
+mastered_or_owned_amps = NameSet()
+mastered_or_owned_arch_weapons = NameSet()
+mastered_or_owned_sentinels_and_companions = NameSet()
+mastered_or_owned_others = NameSet()
 
 # Separate Unmastered
-unmastered_warframes = set()
-unmastered_primaries = set()
-unmastered_secondaries = set()
-unmastered_melees = set()
-unmastered_amps = set()
-unmastered_arch_weapons = set()
-unmastered_sentinels_and_companions = set()
-unmastered_others = set()
+unmastered_warframes = NameSet()
+unmastered_primaries = NameSet()
+unmastered_secondaries = NameSet()
+unmastered_melees = NameSet()
+unmastered_amps = NameSet()
+unmastered_arch_weapons = NameSet()
+unmastered_sentinels_and_companions = NameSet()
+unmastered_others = NameSet()
 
 # Sellable duplicates
 duplicate_prime_parts = set()
@@ -51,6 +57,41 @@ weapon_parts = {}
 sentinel_parts = {}
 sellable_prime_sets = {}
 
+# Context dictionary for menu functions
+context = {
+    "warframe_name": warframe_name,
+    "archwing_name": archwing_name,
+    "weapon_name_category": weapon_name_category,
+    "sentinel_and_companion_name": sentinel_and_companion_name,
+    "warframe_inventory": warframe_inventory,
+    "part_counts": part_counts,
+    "mastered_item_paths": mastered_item_paths,
+    "warframe_parts": warframe_parts,
+    "archwing_parts": archwing_parts,
+    "weapon_parts": weapon_parts,
+    "sentinel_parts": sentinel_parts,
+    "sellable_prime_sets": sellable_prime_sets,
+    "mastered_or_owned_warframes": mastered_or_owned_warframes,
+    "mastered_or_owned_primaries": mastered_or_owned_primaries,
+    "mastered_or_owned_secondaries": mastered_or_owned_secondaries,
+    "mastered_or_owned_melees": mastered_or_owned_melees,
+    "mastered_or_owned_amps": mastered_or_owned_amps,
+    "mastered_or_owned_arch_weapons": mastered_or_owned_arch_weapons,
+    "mastered_or_owned_sentinels_and_companions": mastered_or_owned_sentinels_and_companions,
+    "mastered_or_owned_others": mastered_or_owned_others,
+    "unmastered_warframes": unmastered_warframes,
+    "unmastered_primaries": unmastered_primaries,
+    "unmastered_secondaries": unmastered_secondaries,
+    "unmastered_melees": unmastered_melees,
+    "unmastered_amps": unmastered_amps,
+    "unmastered_arch_weapons": unmastered_arch_weapons,
+    "unmastered_sentinels_and_companions": unmastered_sentinels_and_companions,
+    "unmastered_others": unmastered_others,
+    "duplicate_prime_parts": duplicate_prime_parts,
+    "mastered_prime_parts": mastered_prime_parts,
+    "computed_views": set(),
+}
+
 # ----------------------------------- Main -----------------------------------
 
 # Main command-line functionality
@@ -68,8 +109,24 @@ if __name__ == "__main__":
         help="Don't fetch new inventory and json files on start.",
         action="store_true",
     )
+    parser.add_argument(
+        "--pretty-json",
+        help="Save downloaded json files indented, for reading them by hand.",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--cache-stats",
+        help="Print name cache hits/misses on exit.",
+        action="store_true",
+    )
     args = parser.parse_args()
 
+    if args.pretty_json:
+        json_stream.PRETTY_JSON = True
+
+    if args.cache_stats:
+        atexit.register(lambda: print(f"Name cache: {clean_name_cache_info()}"))
+
     # Check that the Warframe is started and logged in.
     if not args.yes:
         logged_in_check = "n"
@@ -81,77 +138,7 @@ if __name__ == "__main__":
     if not args.no_fetch:
         # Fetch and Filter everything
         json_fetcher.fetch_warframe_json_data()
-    fetch_items(
-        warframe_name,
-        archwing_name,
-        weapon_name_category,
-        sentinel_and_companion_name,
-        warframe_inventory,
-        warframe_parts,
-        archwing_parts,
-        weapon_parts,
-        sentinel_parts,
-    )
-    filter_items(
-        warframe_name,
-        weapon_name_category,
-        sentinel_and_companion_name,
-        warframe_inventory,
-        mastered_or_owned_warframes,
-        mastered_or_owned_primaries,
-        mastered_or_owned_secondaries,
-        mastered_or_owned_melees,
-        mastered_or_owned_amps,
-        mastered_or_owned_arch_weapons,
-        mastered_or_owned_sentinels_and_companions,
-        mastered_or_owned_others,
-        unmastered_warframes,
-        unmastered_primaries,
-        unmastered_secondaries,
-        unmastered_melees,
-        unmastered_amps,
-        unmastered_arch_weapons,
-        unmastered_sentinels_and_companions,
-        unmastered_others,
-        duplicate_prime_parts,
-        mastered_prime_parts,
-        warframe_parts,
-        archwing_parts,
-        weapon_parts,
-        sentinel_parts,
-        sellable_prime_sets,
-    )
-
-    # Create context dictionary for menu functions
-    context = {
-        "warframe_name": warframe_name,
-        "archwing_name": archwing_name,
-        "weapon_name_category": weapon_name_category,
-        "warframe_inventory": warframe_inventory,
-        "warframe_parts": warframe_parts,
-        "archwing_parts": archwing_parts,
-        "weapon_parts": weapon_parts,
-        "sentinel_parts": sentinel_parts,
-        "sellable_prime_sets": sellable_prime_sets,
-        "mastered_or_owned_warframes": mastered_or_owned_warframes,
-        "mastered_or_owned_primaries": mastered_or_owned_primaries,
-        "mastered_or_owned_secondaries": mastered_or_owned_secondaries,
-        "mastered_or_owned_melees": mastered_or_owned_melees,
-        "mastered_or_owned_amps": mastered_or_owned_amps,
-        "mastered_or_owned_arch_weapons": mastered_or_owned_arch_weapons,
-        "mastered_or_owned_sentinels_and_companions": mastered_or_owned_sentinels_and_companions,
-        "mastered_or_owned_others": mastered_or_owned_others,
-        "unmastered_warframes": unmastered_warframes,
-        "unmastered_primaries": unmastered_primaries,
-        "unmastered_secondaries": unmastered_secondaries,
-        "unmastered_melees": unmastered_melees,
-        "unmastered_amps": unmastered_amps,
-        "unmastered_arch_weapons": unmastered_arch_weapons,
-        "unmastered_sentinels_and_companions": unmastered_sentinels_and_companions,
-        "unmastered_others": unmastered_others,
-        "duplicate_prime_parts": duplicate_prime_parts,
-        "mastered_prime_parts": mastered_prime_parts,
-    }
+    # Everything else is computed when a menu first shows it (see views.py)
 
     main_menu(context)
 
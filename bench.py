@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+import argparse
+import subprocess
+import sys
+import time
+
+import inventory_fetcher
+from filter import mastered_prime_checks, prime_check_matcher
+from fixture_server import generate_fixtures
+
+# ----------------------- Micro-Benchmarks -----------------------
+# In-process timings of single WFTracker routines on generated data. The fetch
+# pipeline as a whole is timed against a server by fixture_server.py --bench.
+
+
+def run_matcher_benchmark(sets, seed, repeat=5):
+    """Time matching inventory paths against mastered prime names, both ways"""
+    exports, inventory = generate_fixtures(sets, seed)
+    # Every item and part owned, every prime mastered: the most work for either
+    paths = [item["ItemType"] for items in inventory.values() for item in items]
+    paths += [
+        recipe["uniqueName"]
+        for recipe in exports["ExportRecipes_en.json"]["ExportRecipes"]
+    ]
+    check_names = mastered_prime_checks(
+        {
+            record["name"]
+            for export in exports.values()
+            for records in export.values()
+            for record in records
+            if "name" in record
+        }
+    )
+    print(f"{len(paths)} paths, {len(check_names)} mastered primes")
+
+    matcher = prime_check_matcher(check_names)
+    searches = {
+        "Substring test per name": lambda path: any(
+            check_name in path for check_name in check_names
+        ),
+        "PatternMatcher": matcher.search,
+    }
+    results = set()
+    for label, search in searches.items():
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parts = [path for path in paths if search(path)]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results.add(tuple(parts))
+        print(f"{label:<32}{best:8.3f}s  {len(parts)} parts")
+    if len(results) != 1:
+        print("The matched parts differ!")
+
+
+# Stand-in for the game process: region_count rw regions of region_kib KiB each,
+# kept apart by PROT_NONE guard pages, with an auth string in the highest one
+STAND_IN_GAME = """
+import ctypes, mmap, sys, time
+libc = ctypes.CDLL(None)
+region_count, size = int(sys.argv[2]), int(sys.argv[3]) * 1024
+regions = []
+for i in range(region_count):
+    region = mmap.mmap(-1, size + mmap.PAGESIZE)
+    region.write(bytes([i % 251 + 1]) * size)
+    address = ctypes.addressof(ctypes.c_char.from_buffer(region))
+    libc.mprotect(ctypes.c_void_p(address + size), mmap.PAGESIZE, 0)
+    regions.append(region)
+# Built from parts, so the script text itself doesn't match
+auth = b"?account" + b"Id=" + b"0" * 24 + b"&nonce=" + b"1234567890"
+regions[0][size - 200 : size - 200 + len(auth)] = auth
+print("ready", flush=True)
+time.sleep(600)
+"""
+
+
+def run_nonce_benchmark(region_count, region_kib, repeat=3):
+    """Time both memory readers of inventory_fetcher scanning a stand-in game"""
+    game = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            STAND_IN_GAME,
+            "stand-in",
+            str(region_count),
+            str(region_kib),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        game.stdout.readline()
+        regions = inventory_fetcher.auth_regions(game.pid)
+        scanned = sum(end - start for start, end in regions)
+        print(f"{len(regions)} regions, {scanned / (1 << 20):.0f} MiB")
+
+        readv = inventory_fetcher._load_process_vm_readv()
+        readers = {
+            "/proc/<pid>/mem": lambda: inventory_fetcher.ProcMemReader(game.pid),
+            "process_vm_readv": lambda: inventory_fetcher.VmReader(game.pid, readv),
+        }
+        for label, open_reader in readers.items():
+            if label == "process_vm_readv" and readv is None:
+                print(f"{label:<32}unavailable")
+                continue
+            best = None
+            for _ in range(repeat):
+                with open_reader() as reader:
+                    start = time.perf_counter()
+                    full_auth = reader.scan(regions)
+                    elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{label:<32}{best:8.3f}s  {full_auth}")
+    finally:
+        game.kill()
+        game.wait()
+
+
+# ----------------------------------- Main -----------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time single WFTracker routines.")
+    benchmarks = parser.add_subparsers(dest="benchmark", required=True)
+
+    matcher = benchmarks.add_parser(
+        "matcher",
+        help="Match the generated inventory against the mastered primes.",
+    )
+    matcher.add_argument("--sets", type=int, default=8, help="Sets of each kind.")
+    matcher.add_argument("--seed", type=int, default=1)
+
+    nonce_scan = benchmarks.add_parser(
+        "nonce-scan",
+        help="Scan a stand-in game with both memory readers (Linux).",
+    )
+    nonce_scan.add_argument("regions", type=int, help="Memory regions to scan.")
+    nonce_scan.add_argument("kib", type=int, help="Size of each region in KiB.")
+
+    args = parser.parse_args()
+    if args.benchmark == "matcher":
+        run_matcher_benchmark(args.sets, args.seed)
+    elif args.benchmark == "nonce-scan":
+        run_nonce_benchmark(args.regions, args.kib)
+
+# ----------------------------------- END OF FILE -----------------------------------
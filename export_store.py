@@ -0,0 +1,271 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from json_stream import iter_array
+
+# Local file each PublicExport is saved to by json_fetcher
+EXPORT_FILES = {
+    "ExportWarframes": "warframe_warframes.json",
+    "ExportWeapons": "warframe_weapons.json",
+    "ExportRecipes": "warframe_recipes.json",
+    "ExportSentinels": "warframe_sentinels.json",
+}
+
+# Fields kept from each record, everything else is dropped while parsing
+EXPORT_FIELDS = {
+    "ExportWarframes": ("uniqueName", "name"),
+    "ExportWeapons": ("uniqueName", "name", "productCategory"),
+    "ExportRecipes": ("uniqueName", "resultType", "ingredients"),
+    "ExportSentinels": ("uniqueName", "name"),
+}
+INGREDIENT_FIELDS = ("ItemType", "ItemCount")
+
+# Suffixes of the two inventory versions of a part
+PART_SUFFIXES = ("Blueprint", "Component")
+
+# Marks the end of a stream in iter_records
+_END = object()
+
+
+def slim_record(export, record):
+    """Keep only the fields WFTracker reads from an export record"""
+    slim = {field: record[field] for field in EXPORT_FIELDS[export] if field in record}
+    if "ingredients" in slim:
+        slim["ingredients"] = [
+            {
+                field: ingredient[field]
+                for field in INGREDIENT_FIELDS
+                if field in ingredient
+            }
+            for ingredient in slim["ingredients"]
+        ]
+    return slim
+
+
+def part_base(item_type):
+    """Path of a part without its Blueprint/Component suffix"""
+    for suffix in PART_SUFFIXES:
+        if item_type.endswith(suffix):
+            return item_type[: -len(suffix)]
+    return item_type
+
+
+def _load_slim_records(folder, export):
+    """Worker for ExportStore.preload: decode one export file into slim records"""
+    return list(ExportStore(folder)._stream(export))
+
+
+# ----------------------- Export Store -----------------------
+
+
+class ExportStore:
+    """
+    Shared, lazily loaded access to the PublicExport files.
+
+    Each export is parsed on first access and kept as one copy. Indexed views are
+    built from that copy on first use. invalidate() drops everything, so the next
+    access reads the files again.
+    """
+
+    def __init__(self, folder="./"):
+        self.folder = folder
+        self._records = {}
+        self._pending = {}
+        self._views = {}
+        self._version = None
+        self._listeners = []
+
+    def on_invalidate(self, callback):
+        """Call callback() whenever the store is invalidated"""
+        self._listeners.append(callback)
+
+    def invalidate(self):
+        """Drop all loaded exports and views"""
+        self._records.clear()
+        for _, stream in self._pending.values():
+            stream.close()
+        self._pending.clear()
+        self._views.clear()
+        for callback in self._listeners:
+            callback()
+
+    def _get_version(self):
+        """Return a (mtime, size) signature of the export files"""
+        version = []
+        for filename in EXPORT_FILES.values():
+            try:
+                stat = os.stat(self.folder + filename)
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                version.append(None)
+        return tuple(version)
+
+    def refresh(self):
+        """Invalidate the store if the export files changed since they were loaded"""
+        version = self._get_version()
+        if version != self._version:
+            self.invalidate()
+            self._version = version
+
+    def _stream(self, export):
+        """Decode an export file one slim record at a time"""
+        with open(self.folder + EXPORT_FILES[export], encoding="utf-8") as f:
+            for record in iter_array(f, export):
+                yield slim_record(export, record)
+
+    def iter_records(self, export):
+        """
+        Yield the records of an export while it is being decoded.
+
+        The records are kept as they arrive, so the file is still parsed only once
+        even if records() is called for the same export before this finishes.
+        Raises RuntimeError if the store is invalidated before the end is reached.
+        """
+        if export in self._records:
+            yield from self._records[export]
+            return
+
+        if export not in self._pending:
+            self._pending[export] = ([], self._stream(export))
+        loaded, stream = self._pending[export]
+
+        i = 0
+        while True:
+            if i < len(loaded):
+                yield loaded[i]
+                i += 1
+                continue
+            record = next(stream, _END)
+            if record is _END:
+                break
+            loaded.append(record)
+
+        if self._pending.get(export, (None, None))[1] is stream:
+            # The stream ran to the end of the file
+            self._records[export] = loaded
+            self._pending.pop(export)
+        elif self._records.get(export) is not loaded:
+            # The stream was closed early: by preload(), which loaded the export
+            # itself, or by invalidate(), which dropped what was read so far
+            if export not in self._records:
+                raise RuntimeError(f"{export} was invalidated while being read")
+            yield from self._records[export][i:]
+
+    def preload(self, exports=None):
+        """
+        Decode the exports that aren't loaded yet in worker processes, one per file.
+
+        Workers send back only the slim records, so loading takes about as long as
+        the largest file instead of all of them in a row.
+        """
+        exports = [
+            export
+            for export in (exports or EXPORT_FILES)
+            if export not in self._records
+        ]
+        if not exports:
+            return
+
+        workers = min(len(exports), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            loaded = pool.map(_load_slim_records, [self.folder] * len(exports), exports)
+            for export, records in zip(exports, loaded):
+                # A stream started in this process is no longer needed
+                pending = self._pending.pop(export, None)
+                if pending:
+                    pending[1].close()
+                self._records[export] = records
+
+    def records(self, export):
+        """Return the list of records in an export, e.g. records("ExportRecipes")"""
+        if export not in self._records:
+            for _ in self.iter_records(export):
+                pass
+        return self._records[export]
+
+    def _view(self, key, build):
+        """Build a view once and keep it until the next invalidate()"""
+        if key not in self._views:
+            self._views[key] = build()
+        return self._views[key]
+
+    # ----------------------- Indexed Views -----------------------
+
+    def by_unique_name(self, export):
+        """{uniqueName: record} for an export, in file order"""
+        return self._view(
+            ("by_unique_name", export),
+            lambda: {record["uniqueName"]: record for record in self.records(export)},
+        )
+
+    def names(self, export):
+        """{uniqueName: name} for an export"""
+        return self._view(
+            ("names", export),
+            lambda: {
+                unique_name: record["name"]
+                for unique_name, record in self.by_unique_name(export).items()
+            },
+        )
+
+    def by_category(self, export):
+        """{productCategory: [record, ...]} for an export"""
+
+        def build():
+            view = {}
+            for record in self.by_unique_name(export).values():
+                view.setdefault(record.get("productCategory"), []).append(record)
+            return view
+
+        return self._view(("by_category", export), build)
+
+    def recipes_by_result_type(self):
+        """{resultType: [recipe uniqueName, ...]} in recipe file order"""
+
+        def build():
+            view = {}
+            for recipe_name, recipe in self.by_unique_name("ExportRecipes").items():
+                view.setdefault(recipe.get("resultType"), []).append(recipe_name)
+            return view
+
+        return self._view("recipes_by_result_type", build)
+
+    def recipes_by_ingredient(self):
+        """{ingredient ItemType: [recipe uniqueName, ...]} in recipe file order"""
+
+        def build():
+            view = {}
+            for recipe_name, recipe in self.by_unique_name("ExportRecipes").items():
+                for ingredient in recipe.get("ingredients", []):
+                    consumers = view.setdefault(ingredient.get("ItemType"), [])
+                    # An ingredient listed twice in one recipe only needs one entry
+                    if not consumers or consumers[-1] != recipe_name:
+                        consumers.append(recipe_name)
+            return view
+
+        return self._view("recipes_by_ingredient", build)
+
+    def part_requirements(self):
+        """
+        {part base path: count} of every part needed to build one of each recipe.
+
+        Ingredients are counted with their ItemCount, summed over the recipes using
+        them. Blueprints of finished items are needed once.
+        """
+
+        def build():
+            view = {}
+            for recipe in self.by_unique_name("ExportRecipes").values():
+                for ingredient in recipe.get("ingredients", []):
+                    base = part_base(ingredient.get("ItemType", ""))
+                    view[base] = view.get(base, 0) + ingredient.get("ItemCount", 1)
+            for recipe_name in self.by_unique_name("ExportRecipes"):
+                # Blueprints of parts are already counted through the part
+                view.setdefault(part_base(recipe_name), 1)
+            return view
+
+        return self._view("part_requirements", build)
+
+
+# The store shared by fetch, format and json_fetcher
+store = ExportStore()
@@ -1,7 +1,10 @@
 import json
 
 import settings
-from format import clean_name
+from export_store import store
+from format import clean_name, load_name_table, save_name_table, table_records
+from json_fetcher import export_keys
+from records import ARCHWING_PARTS, SENTINEL_PARTS, WARFRAME_PARTS, Part, SetProgress
 
 # ----------------------- Helper Functions -----------------------
 
@@ -39,268 +42,340 @@ def get_part_counts(item_type, warframe_inventory):
     return bp_count, comp_count
 
 
+# Counts of a part none of whose versions are in the inventory
+NO_PART_COUNTS = (0, 0)
+
+
+def index_part_counts(warframe_inventory, part_counts):
+    """
+    Fill part_counts with the get_part_counts result of every part in the inventory.
+
+    Each result is stored under the Blueprint, Component and plain path of the
+    part, so set builders can look up an ingredient with a single .get().
+    Parts with no version in the inventory are left out (NO_PART_COUNTS).
+    """
+    part_counts.clear()
+
+    # Bases whose counts read an inventory item: its own base, and the item
+    # itself for the plain-name fallback
+    bases = set()
+    for item_type in warframe_inventory:
+        bases.add(item_type)
+        for suffix in ("Blueprint", "Component"):
+            if item_type.endswith(suffix):
+                bases.add(item_type[: -len(suffix)])
+
+    for base in bases:
+        counts = get_part_counts(base + "Blueprint", warframe_inventory)
+        part_counts[base + "Blueprint"] = counts
+        part_counts[base + "Component"] = counts
+        # A suffixed base is itself a version of a shorter base
+        if not base.endswith(("Blueprint", "Component")):
+            part_counts[base] = counts
+
+
 # ----------------------- Fetching from API:s -----------------------
 
 
+# Records of an export fetch_base_data reads, from the name table when it's in use
+def base_records(export):
+    records = table_records(export)
+    if records is None:
+        records = store.records(export)
+    return records
+
 
 # Fetch all currently available warframes in the game
 def fetch_warframes(warframe_name, archwing_name):
-    with open("warframe_warframes.json", encoding="utf-8") as wf:
-        json_data = json.load(wf)
-        for warframe in json_data["ExportWarframes"]:
-            unique_name = warframe["uniqueName"]
-            if "Archwing" in unique_name:
-                archwing_name[unique_name] = warframe["name"]
-            else:
-                warframe_name[unique_name] = warframe["name"]
+    for warframe in base_records("ExportWarframes"):
+        unique_name = warframe["uniqueName"]
+        if "Archwing" in unique_name:
+            archwing_name[unique_name] = warframe["name"]
+        else:
+            warframe_name[unique_name] = warframe["name"]
 
 
 # Fetch all currently available weapons in the game
 def fetch_weapons(weapon_name_category):
-    with open("warframe_weapons.json", encoding="utf-8") as wp:
-        json_data = json.load(wp)
-        for weapon in json_data["ExportWeapons"]:
-            weapon_name_category[weapon["uniqueName"]] = {
-                "name": weapon["name"],
-                "category": weapon["productCategory"],
-            }
+    for weapon in base_records("ExportWeapons"):
+        weapon_name_category[weapon["uniqueName"]] = {
+            "name": weapon["name"],
+            "category": weapon["productCategory"],
+        }
 
 
 # Fetch all Sentinel data in the game
 def fetch_sentinels_and_companions(sentinel_and_companion_name):
-    with open("warframe_sentinels.json", encoding="utf-8") as sf:
-        json_data = json.load(sf)
-        for sentinel in json_data["ExportSentinels"]:
-            unique_name = sentinel["uniqueName"]
-            sentinel_and_companion_name[unique_name] = sentinel["name"]
-
-
-# Fetch all Warframe and Archwing Recipes in the game
-def fetch_warframe_and_archwing_recipes(
-    warframe_name, archwing_name, warframe_inventory, warframe_parts, archwing_parts
-):
-    with open("warframe_recipes.json", encoding="utf-8") as wr:
-        json_data = json.load(wr)
+    for sentinel in base_records("ExportSentinels"):
+        unique_name = sentinel["uniqueName"]
+        sentinel_and_companion_name[unique_name] = sentinel["name"]
 
-        for recipe in json_data["ExportRecipes"]:
-            unique_name = recipe["uniqueName"]
-            result_type = recipe["resultType"]
 
-            is_warframe = result_type in warframe_name
-            is_archwing = result_type in archwing_name
-
-            if not settings.INCLUDE_NON_PRIME_WARFRAMES_IN_SETS:
-                if "Prime" not in unique_name:
-                    continue
-            if not is_warframe and not is_archwing:
-                continue
-
-            # Blueprint
-            bp_name = clean_name(unique_name)
-            bp_count = warframe_inventory.get(unique_name, 0)
-            bp_tuple = (bp_name, bp_count, 0)
-
-            progress = 1 if bp_count >= 1 else 0
-
-            if is_warframe:
-                entry = {
-                    "name": warframe_name[result_type],
-                    "blueprint": bp_tuple,
-                    "neuroptics": ("", 0, 0),
-                    "chassis": ("", 0, 0),
-                    "systems": ("", 0, 0),
-                }
-            else:
-                entry = {
-                    "name": clean_name(archwing_name[result_type]),
-                    "blueprint": bp_tuple,
-                    "harness": ("", 0, 0),
-                    "wings": ("", 0, 0),
-                    "systems": ("", 0, 0),
-                }
-
-            for ingredient in recipe.get("ingredients", []):
-                item_type = ingredient["ItemType"]
-                part_name = clean_name(item_type)
-
-                if not any(
-                    x in part_name
-                    for x in ["Neuroptics", "Chassis", "Systems", "Harness", "Wings"]
-                ):
-                    continue
-
-                # Get both blueprint and component counts
-                bp_count, comp_count = get_part_counts(item_type, warframe_inventory)
-                total_count = bp_count + comp_count
-
-                part_tuple = (part_name, bp_count, comp_count)
-
-                if total_count >= 1:
-                    progress += 1
-
-                # Sentinel parts
-                if is_warframe:
-                    if "Neuroptics" in part_name:
-                        entry["neuroptics"] = part_tuple
-                    elif "Chassis" in part_name:
-                        entry["chassis"] = part_tuple
-                    elif "Systems" in part_name:
-                        entry["systems"] = part_tuple
-
-                # Archwing parts
-                else:
-                    if "Harness" in part_name or "Chassis" in part_name:
-                        entry["harness"] = part_tuple
-                    elif "Wings" in part_name:
-                        entry["wings"] = part_tuple
-                    elif "Systems" in part_name:
-                        entry["systems"] = part_tuple
-
-            if progress >= settings.WARFRAME_PROGRESS_FILTER:
-                if is_warframe:
-                    warframe_parts[unique_name] = entry
-                else:
-                    archwing_parts[unique_name] = entry
-
-
-# Fetch all Weapon Recipes in the game
-def fetch_weapon_recipes(
-    weapon_name_category, warframe_inventory, weapon_parts, warframe_name, archwing_name
+# Add the set of a Warframe or Archwing recipe
+def add_warframe_or_archwing_set(
+    recipe,
+    warframe_name,
+    archwing_name,
+    warframe_inventory,
+    part_counts,
+    warframe_parts,
+    archwing_parts,
 ):
-    with open("warframe_recipes.json", encoding="utf-8") as wr:
-        json_data = json.load(wr)
-
-        for recipe in json_data["ExportRecipes"]:
-            unique_name = recipe["uniqueName"]
-            result_type = recipe["resultType"]
-
-            if not settings.INCLUDE_NON_PRIME_WEAPONS_IN_SETS:
-                if "Prime" not in unique_name:
-                    continue
-            if result_type in warframe_name or result_type in archwing_name:
-                continue
-            if "Sentinel" in unique_name or "Sentinel" in clean_name(result_type):
-                continue
-            if "Weapons" not in unique_name:
-                continue
-            # Skip weapon part blueprints (WeaponParts recipes shouldn't end in Blueprint)
-            if "WeaponParts" in unique_name and unique_name.endswith("Blueprint"):
-                continue
-
-            bp_count = warframe_inventory.get(unique_name, 0)
-            blueprint = (clean_name(unique_name), bp_count, 0)
+    unique_name = recipe["uniqueName"]
+    result_type = recipe["resultType"]
 
-            progress = 1 if bp_count >= 1 else 0
-            owned_parts = []
+    is_warframe = result_type in warframe_name
+    is_archwing = result_type in archwing_name
 
-            for ingredient in recipe.get("ingredients", []):
-                item_type = ingredient["ItemType"]
-                part_name = clean_name(item_type)
+    if not settings.INCLUDE_NON_PRIME_WARFRAMES_IN_SETS:
+        if "Prime" not in unique_name:
+            return
+    if not is_warframe and not is_archwing:
+        return
 
-                # Skip resources like OrokinCell, Plastids, etc.
-                # Resources are in MiscItems folder and have common resource names
-                if "MiscItems" in item_type:
-                    # This is a resource from MiscItems, skip it
-                    continue
+    # Blueprint
+    blueprint = Part(clean_name(unique_name), warframe_inventory.get(unique_name, 0))
 
-                if not settings.INCLUDE_NON_PRIME_WEAPONS_IN_SETS:
-                    if "Prime" not in part_name:
-                        continue
-
-                # Count both Blueprint and Component versions
-                bp_count, comp_count = get_part_counts(item_type, warframe_inventory)
-                total_count = bp_count + comp_count
+    if is_warframe:
+        name = warframe_name[result_type]
+        parts = {column: Part() for column in WARFRAME_PARTS}
+    else:
+        name = clean_name(archwing_name[result_type])
+        parts = {column: Part() for column in ARCHWING_PARTS}
 
-                # Include all parts, even those with 0 count
-                owned_parts.append((part_name, bp_count, comp_count))
-                if total_count >= 1:
-                    progress += 1
+    for ingredient in recipe.get("ingredients", []):
+        item_type = ingredient["ItemType"]
+        part_name = clean_name(item_type)
 
-            if progress >= settings.WEAPON_PROGRESS_FILTER:
-                weapon_parts[unique_name] = {
-                    "name": weapon_name_category[result_type]["name"],
-                    "blueprint": blueprint,
-                    "parts": owned_parts,
-                }
+        if not any(
+            x in part_name
+            for x in ["Neuroptics", "Chassis", "Systems", "Harness", "Wings"]
+        ):
+            continue
+
+        # Get both blueprint and component counts
+        bp_count, comp_count = part_counts.get(item_type, NO_PART_COUNTS)
+        part = Part(part_name, bp_count, comp_count)
+
+        # Warframe parts
+        if is_warframe:
+            if "Neuroptics" in part_name:
+                parts["neuroptics"] = part
+            elif "Chassis" in part_name:
+                parts["chassis"] = part
+            elif "Systems" in part_name:
+                parts["systems"] = part
+
+        # Archwing parts
+        else:
+            if "Harness" in part_name or "Chassis" in part_name:
+                parts["harness"] = part
+            elif "Wings" in part_name:
+                parts["wings"] = part
+            elif "Systems" in part_name:
+                parts["systems"] = part
+
+    entry = SetProgress(name, blueprint, parts.values())
+    if entry.progress >= settings.WARFRAME_PROGRESS_FILTER:
+        if is_warframe:
+            warframe_parts[unique_name] = entry
+        else:
+            archwing_parts[unique_name] = entry
 
 
-# Fetch all Sentinel and Companion Recipes in the game
-def fetch_sentinel_and_companion_recipes(
-    sentinel_and_companion_name, warframe_inventory, sentinel_parts
+# Add the set of a Weapon recipe
+def add_weapon_set(
+    recipe,
+    weapon_name_category,
+    warframe_inventory,
+    part_counts,
+    weapon_parts,
+    warframe_name,
+    archwing_name,
 ):
-    with open("warframe_recipes.json", encoding="utf-8") as wr:
-        json_data = json.load(wr)
-
-        for recipe in json_data["ExportRecipes"]:
-            unique_name = recipe["uniqueName"]
-            result_type = recipe["resultType"]
-
-            is_sentinel = result_type in sentinel_and_companion_name
-
-            if not settings.INCLUDE_NON_PRIME_WARFRAMES_IN_SETS:
-                if "Prime" not in unique_name:
-                    continue
-            if not is_sentinel:
-                continue
-            if "Blueprint" not in unique_name:
+    unique_name = recipe["uniqueName"]
+    result_type = recipe["resultType"]
+
+    if not settings.INCLUDE_NON_PRIME_WEAPONS_IN_SETS:
+        if "Prime" not in unique_name:
+            return
+    if result_type in warframe_name or result_type in archwing_name:
+        return
+    if "Sentinel" in unique_name or "Sentinel" in clean_name(result_type):
+        return
+    if "Weapons" not in unique_name:
+        return
+    # Skip weapon part blueprints (WeaponParts recipes shouldn't end in Blueprint)
+    if "WeaponParts" in unique_name and unique_name.endswith("Blueprint"):
+        return
+
+    blueprint = Part(clean_name(unique_name), warframe_inventory.get(unique_name, 0))
+    parts = []
+
+    for ingredient in recipe.get("ingredients", []):
+        item_type = ingredient["ItemType"]
+        part_name = clean_name(item_type)
+
+        # Skip resources like OrokinCell, Plastids, etc.
+        # Resources are in MiscItems folder and have common resource names
+        if "MiscItems" in item_type:
+            # This is a resource from MiscItems, skip it
+            continue
+
+        if not settings.INCLUDE_NON_PRIME_WEAPONS_IN_SETS:
+            if "Prime" not in part_name:
                 continue
 
-            # Blueprint
-            bp_name = clean_name(unique_name)
-            bp_count = warframe_inventory.get(unique_name, 0)
-            bp_tuple = (bp_name, bp_count, 0)
-
-            progress = 1 if bp_count >= 1 else 0
+        # Count both Blueprint and Component versions
+        # Include all parts, even those with 0 count
+        bp_count, comp_count = part_counts.get(item_type, NO_PART_COUNTS)
+        parts.append(Part(part_name, bp_count, comp_count))
 
-            entry = {
-                "name": clean_name(sentinel_and_companion_name[result_type]),
-                "blueprint": bp_tuple,
-                "cerebrum": ("", 0, 0),
-                "carapace": ("", 0, 0),
-                "systems": ("", 0, 0),
-            }
+    weapon_data = weapon_name_category[result_type]
+    entry = SetProgress(
+        weapon_data["name"], blueprint, parts, category=weapon_data["category"]
+    )
+    if entry.progress >= settings.WEAPON_PROGRESS_FILTER:
+        weapon_parts[unique_name] = entry
 
-            for ingredient in recipe.get("ingredients", []):
-                item_type = ingredient["ItemType"]
-                part_name = clean_name(item_type)
 
-                if not any(
-                    x in part_name
-                    for x in [
-                        "Cerebrum",
-                        "Carapace",
-                        "Systems",
-                    ]
-                ):
-                    continue
+# Add the set of a Sentinel or Companion recipe
+def add_sentinel_or_companion_set(
+    recipe, sentinel_and_companion_name, warframe_inventory, part_counts, sentinel_parts
+):
+    unique_name = recipe["uniqueName"]
+    result_type = recipe["resultType"]
+
+    is_sentinel = result_type in sentinel_and_companion_name
+
+    if not settings.INCLUDE_NON_PRIME_WARFRAMES_IN_SETS:
+        if "Prime" not in unique_name:
+            return
+    if not is_sentinel:
+        return
+    if "Blueprint" not in unique_name:
+        return
+
+    # Blueprint
+    blueprint = Part(clean_name(unique_name), warframe_inventory.get(unique_name, 0))
+
+    name = clean_name(sentinel_and_companion_name[result_type])
+    parts = {column: Part() for column in SENTINEL_PARTS}
+
+    for ingredient in recipe.get("ingredients", []):
+        item_type = ingredient["ItemType"]
+        part_name = clean_name(item_type)
+
+        if not any(
+            x in part_name
+            for x in [
+                "Cerebrum",
+                "Carapace",
+                "Systems",
+            ]
+        ):
+            continue
 
-                # Remove duplicate "Prime" if it appears twice
-                part_name = part_name.replace("Prime Prime", "Prime")
+        # Remove duplicate "Prime" if it appears twice
+        part_name = part_name.replace("Prime Prime", "Prime")
 
-                # Get both blueprint and component counts
-                bp_count, comp_count = get_part_counts(item_type, warframe_inventory)
-                total_count = bp_count + comp_count
+        # Get both blueprint and component counts
+        bp_count, comp_count = part_counts.get(item_type, NO_PART_COUNTS)
+        part = Part(part_name, bp_count, comp_count)
 
-                part_tuple = (part_name, bp_count, comp_count)
+        # Sentinel parts
+        if "Cerebrum" in part_name:
+            parts["cerebrum"] = part
+        elif "Carapace" in part_name:
+            parts["carapace"] = part
+        elif "Systems" in part_name:
+            parts["systems"] = part
 
-                if total_count >= 1:
-                    progress += 1
+    entry = SetProgress(name, blueprint, parts.values())
+    if entry.progress >= settings.WARFRAME_PROGRESS_FILTER:
+        sentinel_parts[unique_name] = entry
 
-                # Sentinel parts
-                if "Cerebrum" in part_name:
-                    entry["cerebrum"] = part_tuple
-                elif "Carapace" in part_name:
-                    entry["carapace"] = part_tuple
-                elif "Systems" in part_name:
-                    entry["systems"] = part_tuple
 
-            if progress >= settings.WARFRAME_PROGRESS_FILTER:
-                sentinel_parts[unique_name] = entry
+# Add a recipe to the set table it belongs to
+def add_recipe_set(
+    recipe,
+    warframe_name,
+    archwing_name,
+    weapon_name_category,
+    sentinel_and_companion_name,
+    warframe_inventory,
+    part_counts,
+    warframe_parts,
+    archwing_parts,
+    weapon_parts,
+    sentinel_parts,
+):
+    result_type = recipe["resultType"]
+
+    if result_type in warframe_name or result_type in archwing_name:
+        add_warframe_or_archwing_set(
+            recipe,
+            warframe_name,
+            archwing_name,
+            warframe_inventory,
+            part_counts,
+            warframe_parts,
+            archwing_parts,
+        )
+    elif result_type in sentinel_and_companion_name:
+        add_sentinel_or_companion_set(
+            recipe,
+            sentinel_and_companion_name,
+            warframe_inventory,
+            part_counts,
+            sentinel_parts,
+        )
+    else:
+        add_weapon_set(
+            recipe,
+            weapon_name_category,
+            warframe_inventory,
+            part_counts,
+            weapon_parts,
+            warframe_name,
+            archwing_name,
+        )
+
+
+# Fetch all Recipes in the game and sort them into sets in a single pass
+def fetch_recipe_sets(
+    warframe_name,
+    archwing_name,
+    weapon_name_category,
+    sentinel_and_companion_name,
+    warframe_inventory,
+    part_counts,
+    warframe_parts,
+    archwing_parts,
+    weapon_parts,
+    sentinel_parts,
+):
+    # Sets are built while the recipes are still being decoded, and the parsed
+    # records stay in the store for the name lookups, so the file is read once
+    for recipe in store.iter_records("ExportRecipes"):
+        add_recipe_set(
+            recipe,
+            warframe_name,
+            archwing_name,
+            weapon_name_category,
+            sentinel_and_companion_name,
+            warframe_inventory,
+            part_counts,
+            warframe_parts,
+            archwing_parts,
+            weapon_parts,
+            sentinel_parts,
+        )
 
 
 # Fetch the inventory data.
 def fetch_inventory_data(warframe_inventory):
-    with open("inventory.json") as f:
+    with open("inventory.json", encoding="utf-8") as f:
         data = json.load(f)
 
     # Helper function to check if an item should be included based on prime filter
@@ -356,32 +431,69 @@ def fetch_inventory_data(warframe_inventory):
                 warframe_inventory[item_type] = item.get("ItemCount", 0)
 
 
-# Fetch everything in correct order, helper for main
+# Fetch the uniqueNames of every mastered item (XPInfo) from the inventory.
+def fetch_mastered_item_paths():
+    with open("inventory.json", encoding="utf-8") as f:
+        data = json.load(f)
+
+    return {item["ItemType"] for item in data["XPInfo"]}
+
+
+# Fetch the names from the exports and the inventory, everything the sets and filters read
+def fetch_base_data(
+    warframe_name,
+    archwing_name,
+    weapon_name_category,
+    sentinel_and_companion_name,
+    warframe_inventory,
+    part_counts,
+):
+    # Reload exports and names if the files were re-downloaded since the last run
+    store.refresh()
+    # Names and the records read below come from the precomputed table, the
+    # exports are only loaded to build it once per export version
+    keys = export_keys()
+    if not load_name_table(keys):
+        if settings.PARALLEL_EXPORT_LOADING:
+            store.preload()
+        save_name_table(keys)
+    fetch_inventory_data(warframe_inventory)
+    index_part_counts(warframe_inventory, part_counts)
+    fetch_warframes(warframe_name, archwing_name)
+    fetch_weapons(weapon_name_category)
+    fetch_sentinels_and_companions(sentinel_and_companion_name)
+
+
+# Fetch everything in correct order at once (the menus go through views.py instead)
 def fetch_items(
     warframe_name,
     archwing_name,
     weapon_name_category,
     sentinel_and_companion_name,
     warframe_inventory,
+    part_counts,
     warframe_parts,
     archwing_parts,
     weapon_parts,
     sentinel_parts,
 ):
-    fetch_inventory_data(warframe_inventory)
-    fetch_warframes(warframe_name, archwing_name)
-    fetch_weapons(weapon_name_category)
-    fetch_sentinels_and_companions(sentinel_and_companion_name)
-    fetch_warframe_and_archwing_recipes(
-        warframe_name, archwing_name, warframe_inventory, warframe_parts, archwing_parts
-    )
-    fetch_weapon_recipes(
+    fetch_base_data(
+        warframe_name,
+        archwing_name,
         weapon_name_category,
+        sentinel_and_companion_name,
         warframe_inventory,
-        weapon_parts,
+        part_counts,
+    )
+    fetch_recipe_sets(
         warframe_name,
         archwing_name,
-    )
-    fetch_sentinel_and_companion_recipes(
-        sentinel_and_companion_name, warframe_inventory, sentinel_parts
+        weapon_name_category,
+        sentinel_and_companion_name,
+        warframe_inventory,
+        part_counts,
+        warframe_parts,
+        archwing_parts,
+        weapon_parts,
+        sentinel_parts,
     )
@@ -1,15 +1,57 @@
-import json
-
-from fetch import clean_name
+from export_store import part_base, store
+from fetch import NO_PART_COUNTS, fetch_mastered_item_paths
+from format import clean_name
+from name_set import NameSet
+from pattern_matcher import PatternMatcher
 
 # ----------------------- Filter API-data into categories -----------------------
 
 
+# Bucket suffix of the mastered_or_owned_* / unmastered_* set each weapon category goes in
+WEAPON_BUCKETS = {
+    "OperatorAmplifiers": "amps",
+    "LongGuns": "primaries",
+    "Pistols": "secondaries",
+    "Melee": "melees",
+    "SpaceGuns": "arch_weapons",
+    "SpaceMelee": "arch_weapons",
+}
+
+
+# Yield the (bucket, name) every mastered item path is filed under.
+def mastery_buckets(
+    item_paths, warframe_name, weapon_name_category, sentinel_and_companion_name
+):
+    for item_path in item_paths:
+        # Mastered Warframes
+        if item_path in warframe_name:
+            yield "warframes", warframe_name[item_path]
+
+        # Mastered Sentinels and Companions
+        if item_path in sentinel_and_companion_name:
+            yield "sentinels_and_companions", clean_name(
+                sentinel_and_companion_name[item_path]
+            )
+
+        # Mastered Weapons
+        if item_path in weapon_name_category:
+            weapon_data = weapon_name_category[item_path]
+            name = weapon_data["name"]
+            # Weirdly categoriezed in API. Might set up exceptions to catch later...
+            bucket = WEAPON_BUCKETS.get(weapon_data["category"], "others")
+
+            # Arch-Weapon
+            if bucket == "arch_weapons":
+                name = clean_name(name)
+            yield bucket, name
+
+
 # Get which items have been mastered thus far.
 def filter_mastered_and_owned_gear(
     warframe_name,
     weapon_name_category,
     sentinel_and_companion_name,
+    mastered_item_paths,
     mastered_or_owned_warframes,
     mastered_or_owned_primaries,
     mastered_or_owned_secondaries,
@@ -19,52 +61,46 @@ def filter_mastered_and_owned_gear(
     mastered_or_owned_sentinels_and_companions,
     mastered_or_owned_others,
 ):
-    with open("inventory.json", encoding="utf-8") as inv:
-        json_data = json.load(inv)
-
-        # Get Mastered Item/Warframes etc
-        for mastered_item in json_data["XPInfo"]:
-            item_path = mastered_item["ItemType"]
-
-            # Filter Mastered Warframes
-            if item_path in warframe_name:
-                mastered_or_owned_warframes.add(warframe_name[item_path])
-
-            # Filter Mastered Sentinels and Companions
-            if item_path in sentinel_and_companion_name:
-                mastered_or_owned_sentinels_and_companions.add(
-                    clean_name(sentinel_and_companion_name[item_path])
-                )
-
-            # Filter Mastered Weapons
-            if item_path in weapon_name_category:
-                weapon_data = weapon_name_category[item_path]
-                name = weapon_data["name"]
-                category = weapon_data["category"]
+    buckets = {
+        "warframes": mastered_or_owned_warframes,
+        "primaries": mastered_or_owned_primaries,
+        "secondaries": mastered_or_owned_secondaries,
+        "melees": mastered_or_owned_melees,
+        "amps": mastered_or_owned_amps,
+        "arch_weapons": mastered_or_owned_arch_weapons,
+        "sentinels_and_companions": mastered_or_owned_sentinels_and_companions,
+        "others": mastered_or_owned_others,
+    }
+
+    # Get Mastered Item/Warframes etc
+    mastered_item_paths.update(fetch_mastered_item_paths())
+    for bucket, name in mastery_buckets(
+        mastered_item_paths,
+        warframe_name,
+        weapon_name_category,
+        sentinel_and_companion_name,
+    ):
+        buckets[bucket].add(name)
 
-                # Amp
-                if category == "OperatorAmplifiers":
-                    mastered_or_owned_amps.add(name)
 
-                # Primary
-                elif category == "LongGuns":
-                    mastered_or_owned_primaries.add(name)
+# Names of mastered primes as they appear in inventory paths ("Paris Prime" -> "ParisPrime")
+def mastered_prime_checks(aggrigate_mastered_items):
+    return {
+        mastered_item.replace(" ", "")
+        for mastered_item in aggrigate_mastered_items
+        if "Prime" in mastered_item
+    }
 
-                # Secondary
-                elif category == "Pistols":
-                    mastered_or_owned_secondaries.add(name)
 
-                # Melee
-                elif category == "Melee":
-                    mastered_or_owned_melees.add(name)
+# PatternMatcher over mastered_prime_checks names, which all contain "Prime"
+def prime_check_matcher(check_names):
+    return PatternMatcher(check_names, "Prime")
 
-                # Arch-Weapon
-                elif category in ["SpaceGuns", "SpaceMelee"]:
-                    mastered_or_owned_arch_weapons.add(clean_name(name))
 
-                # Weirdly categoriezed in API. Might set up exceptions to catch later...
-                else:
-                    mastered_or_owned_others.add(name)
+# Whether an inventory item is a part of a mastered prime.
+# check_matcher is a prime_check_matcher over the mastered_prime_checks names.
+def is_mastered_prime_part(inv_item_type, check_matcher):
+    return check_matcher.search(inv_item_type)
 
 
 # Return a list of all prime parts of mastered items.
@@ -79,95 +115,70 @@ def filter_mastered_prime_parts(
     mastered_or_owned_others,
     mastered_prime_parts,
 ):
-    aggrigate_mastered_items = (
-        mastered_or_owned_warframes
-        | mastered_or_owned_primaries
-        | mastered_or_owned_secondaries
-        | mastered_or_owned_melees
-        | mastered_or_owned_amps
-        | mastered_or_owned_arch_weapons
-        | mastered_or_owned_others
+    check_matcher = prime_check_matcher(
+        mastered_prime_checks(
+            mastered_or_owned_warframes
+            | mastered_or_owned_primaries
+            | mastered_or_owned_secondaries
+            | mastered_or_owned_melees
+            | mastered_or_owned_amps
+            | mastered_or_owned_arch_weapons
+            | mastered_or_owned_others
+        )
     )
 
-    inventory_items = warframe_inventory.keys()
+    # One pass over the inventory, each path scanned once for all mastered primes
+    for inv_item_type in warframe_inventory:
+        if is_mastered_prime_part(inv_item_type, check_matcher):
+            mastered_prime_parts.add(
+                (clean_name(inv_item_type), warframe_inventory[inv_item_type])
+            )
+
+
+# How many of a prime inventory item can be sold as duplicates (0 if none).
+def duplicate_count(item, warframe_inventory, part_counts):
+    base = part_base(item)
+    part_requirements = store.part_requirements()
+    if "Prime" not in base or base not in part_requirements:
+        return 0
 
-    for inv_item_type in inventory_items:
-        for mastered_item in aggrigate_mastered_items:
-            if "Prime" not in mastered_item:
-                continue
+    # Owned vs needed to build one of every recipe the part is used in
+    bp_count, comp_count = part_counts.get(item, NO_PART_COUNTS)
+    surplus = bp_count + comp_count - part_requirements[base]
+    if surplus < 1:
+        return 0
 
-            check_name = mastered_item.replace(" ", "")
+    # Sell spare blueprints first and keep the built components
+    sellable_blueprints = min(bp_count, surplus)
+    if item.endswith("Blueprint"):
+        return sellable_blueprints
 
-            if check_name in inv_item_type:
-                mastered_prime_parts.add(
-                    (clean_name(inv_item_type), warframe_inventory[inv_item_type])
-                )
+    # The plain path only counts when there is no Blueprint/Component version
+    if item == base and (bp_count or warframe_inventory.get(base + "Component", 0)):
+        return 0
+    return min(warframe_inventory[item], surplus - sellable_blueprints)
 
 
 # Return each prime item there's a duplicate of.
 def filter_duplicate_prime_parts(
     warframe_inventory,
+    part_counts,
     duplicate_prime_parts,
-    mastered_prime_parts,
 ):
-    # Check for duplicates in aggregate_mastered_items
-    for mastered_item in mastered_prime_parts:
-        if "Prime" not in mastered_item:
-            continue
-
-        # Search inventory for this mastered item (normalized)
-        check_name = mastered_item.replace(" ", "")
-
-        for inv_item in warframe_inventory:
-            if check_name not in inv_item.replace(" ", ""):
-                continue
-
-            item_count = warframe_inventory[inv_item]
-
-            # Check if there's a Blueprint/Component pair
-            component_version = inv_item.replace("Blueprint", "Component")
-            component_count = warframe_inventory.get(component_version, 0)
-
-            # Item is a duplicate if:
-            # 1. Multiple copies exist (count > 1), OR
-            # 2. There's at least 1 blueprint AND 1 component (complete set means blueprint is extra)
-            if item_count > 1 or (item_count >= 1 and component_count >= 1):
-                sellable_count = item_count
-                if sellable_count >= 1:
-                    duplicate_prime_parts.add((clean_name(inv_item), sellable_count))
-
-    # Also check inventory items that aren't directly matched to mastered items
+    # One pass over the inventory, every item compared against the recipes using it
     for item in warframe_inventory:
-        if "Prime" not in item:
-            continue
-
-        blueprint_count = warframe_inventory[item]
-
-        # Check if there's a Component version of this part
-        component_version = item.replace("Blueprint", "Component")
-        component_count = warframe_inventory.get(component_version, 0)
-
-        # The part is sellable if:
-        # 1. There are multiple blueprints (blueprint_count > 1), OR
-        # 2. There's at least 1 blueprint AND 1 component (meaning the set is complete, so blueprint is extra)
-        if blueprint_count > 1 or (blueprint_count >= 1 and component_count >= 1):
-            # Count only the sellable blueprints
-            sellable_count = blueprint_count
-            if component_count >= 1:
-                # If there's a component, we can sell all blueprints (the component means it's built)
-                sellable_count = blueprint_count
-
-            if sellable_count >= 1:
-                duplicate_prime_parts.add((clean_name(item), sellable_count))
+        sellable_count = duplicate_count(item, warframe_inventory, part_counts)
+        if sellable_count >= 1:
+            duplicate_prime_parts.add((clean_name(item), sellable_count))
 
 
 # Filter Unmastered Warframes
 def filter_unmastered_warframes(
     warframe_name, mastered_or_owned_warframes, unmastered_warframes
 ):
-    for _, name in warframe_name.items():
-        if name not in mastered_or_owned_warframes:
-            unmastered_warframes.add(name)
+    unmastered_warframes |= (
+        NameSet(warframe_name.values()) - mastered_or_owned_warframes
+    )
 
 
 # Filter Unmastered Weapons
@@ -186,50 +197,57 @@ def filter_unmastered_weapons(
     unmastered_arch_weapons,
     unmastered_others,
 ):
+    # Every weapon of each kind, the mastered ones are masked out at the end
+    primaries = NameSet()
+    amps = NameSet()
+    melees = NameSet()
+    secondaries = NameSet()
+    arch_weapons = NameSet()
+    others = NameSet()
+
     for key, data in weapon_name_category.items():
         name = data["name"]
         category = data["category"]
 
         # Primary
         if category == "LongGuns":
-            if name not in mastered_or_owned_primaries:
-                unmastered_primaries.add(name)
+            primaries.add(name)
 
         # Amps require the use of the key, since they're categorised as pistols for some reason.
         elif "OperatorAmplifiers" in key and "Prism" in key:
-            if name not in mastered_or_owned_amps:
-                unmastered_amps.add(name)
+            amps.add(name)
 
         # Special case for sirocco since it's marked as a pistol in the key,
         # and the only amp categoriesed as "OperatorAmps". (Hope they change them all to OperatorAmps...)
         elif category == "OperatorAmps":
-            if name not in mastered_or_owned_amps:
-                unmastered_amps.add(name)
+            amps.add(name)
 
         # Special case for Zaw weapons, since they're catagorized as pistols (Surely some day these categories will make sense.)
         elif "/Ostron/Melee" in key and "Tip" in key:
-            if name not in mastered_or_owned_melees:
-                unmastered_melees.add(name)
+            melees.add(name)
 
         # Secondary
         elif category == "Pistols":
-            if name not in mastered_or_owned_secondaries:
-                unmastered_secondaries.add(name)
+            secondaries.add(name)
 
         # Melee
         elif category == "Melee":
-            if name not in mastered_or_owned_melees:
-                unmastered_melees.add(name)
+            melees.add(name)
 
-        # Arch-Weapon
+        # Arch-Weapon (mastered ones are stored cleaned, so compare cleaned)
         elif category in ["SpaceGuns", "SpaceMelee"]:
-            if name not in mastered_or_owned_arch_weapons:
-                unmastered_arch_weapons.add(clean_name(name))
+            arch_weapons.add(clean_name(name))
 
         # Weirdly categoriezed in API. Might set up exceptions to catch later...
         else:
-            if name not in mastered_or_owned_others:
-                unmastered_others.add(name)
+            others.add(name)
+
+    unmastered_primaries |= primaries - mastered_or_owned_primaries
+    unmastered_amps |= amps - mastered_or_owned_amps
+    unmastered_melees |= melees - mastered_or_owned_melees
+    unmastered_secondaries |= secondaries - mastered_or_owned_secondaries
+    unmastered_arch_weapons |= arch_weapons - mastered_or_owned_arch_weapons
+    unmastered_others |= others - mastered_or_owned_others
 
 
 # Filter unmastered sentinels and companions
@@ -238,18 +256,20 @@ def filter_unmastered_sentinels_and_companions(
     mastered_or_owned_sentinels_and_companions,
     unmastered_sentinels_and_companions,
 ):
-    for _, name in sentinel_and_companion_name.items():
-        clean_sentinel_name = clean_name(name)
-        if clean_sentinel_name not in mastered_or_owned_sentinels_and_companions:
-            unmastered_sentinels_and_companions.add(clean_sentinel_name)
+    unmastered_sentinels_and_companions |= (
+        NameSet(clean_name(name) for name in sentinel_and_companion_name.values())
+        - mastered_or_owned_sentinels_and_companions
+    )
 
 
-# Filter everything in correct order, helper for main
+# Filter everything in correct order at once (the menus go through views.py instead)
 def filter_items(
     warframe_name,
     weapon_name_category,
     sentinel_and_companion_name,
     warframe_inventory,
+    part_counts,
+    mastered_item_paths,
     mastered_or_owned_warframes,
     mastered_or_owned_primaries,
     mastered_or_owned_secondaries,
@@ -278,6 +298,7 @@ def filter_items(
         warframe_name,
         weapon_name_category,
         sentinel_and_companion_name,
+        mastered_item_paths,
         mastered_or_owned_warframes,
         mastered_or_owned_primaries,
         mastered_or_owned_secondaries,
@@ -300,8 +321,8 @@ def filter_items(
     )
     filter_duplicate_prime_parts(
         warframe_inventory,
+        part_counts,
         duplicate_prime_parts,
-        mastered_prime_parts,
     )
     filter_unmastered_warframes(
         warframe_name, mastered_or_owned_warframes, unmastered_warframes
@@ -361,63 +382,42 @@ def filter_sellable_prime_sets(
 
     # Check warframe sets
     for unique_name, entry in warframe_parts.items():
-        name = entry["name"]
-        if name in mastered_or_owned_warframes:
-            # Check if all parts are owned (blueprint or component)
-            if (
-                entry["blueprint"][1] >= 1
-                and (entry["neuroptics"][1] >= 1 or entry["neuroptics"][2] >= 1)
-                and (entry["chassis"][1] >= 1 or entry["chassis"][2] >= 1)
-                and (entry["systems"][1] >= 1 or entry["systems"][2] >= 1)
-            ):
-                sellable_prime_sets[name] = sellable_prime_sets.get(name, 0) + 1
+        name = entry.name
+        # Check if all parts are owned (blueprint or component)
+        if name in mastered_or_owned_warframes and entry.complete:
+            sellable_prime_sets[name] = sellable_prime_sets.get(name, 0) + 1
 
     # Check archwing sets
     for unique_name, entry in archwing_parts.items():
-        name = entry["name"]
-        if name in mastered_or_owned_warframes:
-            # Check if all parts are owned (blueprint or component)
-            if (
-                entry["blueprint"][1] >= 1
-                and (entry["harness"][1] >= 1 or entry["harness"][2] >= 1)
-                and (entry["wings"][1] >= 1 or entry["wings"][2] >= 1)
-                and (entry["systems"][1] >= 1 or entry["systems"][2] >= 1)
-            ):
-                sellable_prime_sets[name] = sellable_prime_sets.get(name, 0) + 1
+        name = entry.name
+        # Check if all parts are owned (blueprint or component)
+        if name in mastered_or_owned_warframes and entry.complete:
+            sellable_prime_sets[name] = sellable_prime_sets.get(name, 0) + 1
 
     # Check weapon sets
     for unique_name, entry in weapon_parts.items():
-        name = entry["name"]
-        # Check category to determine mastered status
+        name = entry.name
+        # Check category to determine mastered status (same buckets as filter_mastered_and_owned_gear)
         is_mastered = False
-        if "Primary" in entry.get("category", ""):
+        if entry.category == "LongGuns":
             is_mastered = name in mastered_or_owned_primaries
-        elif "Secondary" in entry.get("category", ""):
+        elif entry.category == "Pistols":
             is_mastered = name in mastered_or_owned_secondaries
-        elif "Melee" in entry.get("category", ""):
+        elif entry.category == "Melee":
             is_mastered = name in mastered_or_owned_melees
-        elif "OperatorAmplifiers" in entry.get("category", ""):
+        elif entry.category == "OperatorAmplifiers":
             is_mastered = name in mastered_or_owned_amps
-        elif "Arch" in entry.get("category", ""):
-            is_mastered = name in mastered_or_owned_arch_weapons
+        elif entry.category in ["SpaceGuns", "SpaceMelee"]:
+            is_mastered = clean_name(name) in mastered_or_owned_arch_weapons
 
         if is_mastered:
             # Check if all parts are owned (blueprint or component)
-            if all(
-                (bp_count >= 1 or comp_count >= 1)
-                for _, bp_count, comp_count in entry["parts"]
-            ):
+            if all(part.owned for part in entry.parts):
                 sellable_prime_sets[name] = sellable_prime_sets.get(name, 0) + 1
 
     # Check sentinel sets
     for unique_name, entry in sentinel_parts.items():
-        name = entry["name"]
-        if name in mastered_or_owned_sentinels_and_companions:
-            # Check if all parts are owned (blueprint or component)
-            if (
-                entry["blueprint"][1] >= 1
-                and (entry["cerebrum"][1] >= 1 or entry["cerebrum"][2] >= 1)
-                and (entry["carapace"][1] >= 1 or entry["carapace"][2] >= 1)
-                and (entry["systems"][1] >= 1 or entry["systems"][2] >= 1)
-            ):
-                sellable_prime_sets[name] = sellable_prime_sets.get(name, 0) + 1
+        name = entry.name
+        # Check if all parts are owned (blueprint or component)
+        if name in mastered_or_owned_sentinels_and_companions and entry.complete:
+            sellable_prime_sets[name] = sellable_prime_sets.get(name, 0) + 1
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+
+import argparse
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import random
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ----------------------- Fixture Data -----------------------
+# A made up but structurally faithful copy of the exports WFTracker reads,
+# so the fetch pipeline can be run and timed without any network.
+
+RECIPES = "/Lotus/Types/Recipes"
+
+WARFRAMES = ["Excalibur", "Nova", "Rhino", "Mag", "Loki", "Volt", "Frost", "Ash"]
+ARCHWINGS = ["Odonata", "Elytron", "Itzal", "Amesha"]
+WEAPONS = ["Braton", "Paris", "Lex", "Orthos", "Boltor", "Soma", "Latron", "Fang"]
+SENTINELS = ["Helios", "Carrier", "Wyrm", "Dethcube", "Shade", "Taxon"]
+
+# (productCategory, kind, parts) cycled through by the generated weapons
+WEAPON_KINDS = [
+    ("LongGuns", "Rifle", ["Barrel", "Receiver", "Stock"]),
+    ("LongGuns", "Bow", ["LowerLimb", "UpperLimb", "String", "Grip"]),
+    ("Pistols", "Pistol", ["Barrel", "Receiver", "Link"]),
+    ("Melee", "Sword", ["Blade", "Hilt", "Handle"]),
+    ("SpaceGuns", "ArchGun", ["Barrel", "Receiver"]),
+    ("SpaceMelee", "ArchMelee", ["Blade", "Handle"]),
+    ("OperatorAmplifiers", "Amp", ["Barrel"]),
+]
+
+
+# Names for the given count, numbered once the base list runs out
+def fixture_names(base_names, count):
+    return [
+        base_names[i % len(base_names)] + ("" if i < len(base_names) else str(i))
+        for i in range(count)
+    ]
+
+
+# Unread filler, real exports carry a lot of fields WFTracker never looks at
+def padded(record, padding, rng):
+    if padding:
+        record["description"] = "".join(
+            rng.choice("abcdefghijklmnopqrstuvwxyz ") for _ in range(padding)
+        )
+    return record
+
+
+def generate_fixtures(sets=8, seed=1, padding=0):
+    """
+    Generate exports and an inventory.
+
+    sets is how many warframes, weapons and sentinels (each also as a Prime) to
+    make and padding is the number of filler characters added to every record.
+    Returns ({export file: export json}, inventory json).
+    """
+    rng = random.Random(seed)
+    warframes, weapons, sentinels, recipes = [], [], [], []
+
+    def add_recipe(unique_name, result_type, ingredients):
+        recipes.append(
+            padded(
+                {
+                    "uniqueName": unique_name,
+                    "resultType": result_type,
+                    "ingredients": ingredients,
+                },
+                padding,
+                rng,
+            )
+        )
+
+    for name in fixture_names(WARFRAMES, sets):
+        for prime in ("", "Prime"):
+            unique_name = f"/Lotus/Powersuits/{name}/{name}{prime}"
+            warframes.append(
+                padded(
+                    {
+                        "uniqueName": unique_name,
+                        "name": f"{name} {prime}".strip(),
+                        "productCategory": "Suits",
+                    },
+                    padding,
+                    rng,
+                )
+            )
+            parts = []
+            for part in ("Helmet", "Chassis", "Systems"):
+                component = f"{RECIPES}/Warframes/{name}{prime}{part}Component"
+                parts.append({"ItemType": component, "ItemCount": 1})
+                add_recipe(
+                    f"{RECIPES}/Warframes/{name}{prime}{part}Blueprint",
+                    component,
+                    [
+                        {
+                            "ItemType": "/Lotus/Types/Items/MiscItems/Alertium",
+                            "ItemCount": 1,
+                        }
+                    ],
+                )
+            parts.append(
+                {"ItemType": "/Lotus/Types/Items/MiscItems/OrokinCell", "ItemCount": 2}
+            )
+            add_recipe(
+                f"{RECIPES}/Warframes/{name}{prime}Blueprint", unique_name, parts
+            )
+
+    for name in fixture_names(ARCHWINGS, max(1, sets // 2)):
+        for prime in ("", "Prime"):
+            unique_name = f"/Lotus/Powersuits/Archwing/{prime}{name}/{prime}{name}Suit"
+            warframes.append(
+                padded(
+                    {
+                        "uniqueName": unique_name,
+                        "name": f"<ARCHWING> {name} {prime}".strip(),
+                    },
+                    padding,
+                    rng,
+                )
+            )
+            base = f"{RECIPES}/ArchwingRecipes/{prime}{name}/{prime}Archwing{name}"
+            parts = []
+            for part in ("Chassis", "Wings", "Systems"):
+                parts.append({"ItemType": f"{base}{part}Component", "ItemCount": 1})
+                add_recipe(f"{base}{part}Blueprint", f"{base}{part}Component", [])
+            add_recipe(f"{base}Blueprint", unique_name, parts)
+
+    for index, name in enumerate(fixture_names(WEAPONS, sets * 4)):
+        for prime in ("", "Prime"):
+            category, kind, part_names = WEAPON_KINDS[index % len(WEAPON_KINDS)]
+            unique_name = (
+                f"/Lotus/Weapons/Tenno/{kind}/{prime}{name}/{prime}{name}{kind}"
+            )
+            display_name = f"{name} {prime}".strip()
+            if category.startswith("Space"):
+                display_name = "<ARCHWING> " + display_name
+            weapons.append(
+                padded(
+                    {
+                        "uniqueName": unique_name,
+                        "name": display_name,
+                        "productCategory": category,
+                    },
+                    padding,
+                    rng,
+                )
+            )
+            parts = [
+                {
+                    "ItemType": f"{RECIPES}/Weapons/WeaponParts/{name}{prime}{kind}{part}",
+                    "ItemCount": 1,
+                }
+                for part in part_names
+            ]
+            parts.append(
+                {"ItemType": "/Lotus/Types/Items/MiscItems/Plastids", "ItemCount": 5}
+            )
+            add_recipe(f"{RECIPES}/Weapons/{name}{prime}Blueprint", unique_name, parts)
+
+    for name in fixture_names(SENTINELS, sets):
+        for prime in ("", "Prime"):
+            unique_name = (
+                f"/Lotus/Types/Sentinels/SentinelPowersuits/{prime}{name}PowerSuit"
+            )
+            sentinels.append(
+                padded(
+                    {"uniqueName": unique_name, "name": f"{name} {prime}".strip()},
+                    padding,
+                    rng,
+                )
+            )
+            base = f"{RECIPES}/SentinelRecipes/{prime}{name}"
+            parts = []
+            for part in ("Cerebrum", "Carapace", "Systems"):
+                parts.append({"ItemType": f"{base}{part}Component", "ItemCount": 1})
+                add_recipe(f"{base}{part}Blueprint", f"{base}{part}Component", [])
+            add_recipe(f"{base}SentinelBlueprint", unique_name, parts)
+
+    rng.shuffle(recipes)
+    exports = {
+        "ExportWarframes_en.json": {"ExportWarframes": warframes},
+        "ExportWeapons_en.json": {"ExportWeapons": weapons},
+        "ExportRecipes_en.json": {"ExportRecipes": recipes},
+        "ExportSentinels_en.json": {"ExportSentinels": sentinels},
+        "ExportRelicArcane_en.json": {"ExportRelicArcane": []},
+    }
+
+    # Own a random share of every blueprint and part, and master half the gear
+    item_types = sorted(
+        {recipe["uniqueName"] for recipe in recipes}
+        | {
+            ingredient["ItemType"]
+            for recipe in recipes
+            for ingredient in recipe["ingredients"]
+        }
+    )
+    inventory = {"MiscItems": [], "Recipes": [], "XPInfo": []}
+    for item_type in item_types:
+        if rng.random() < 0.45:
+            bucket = "Recipes" if item_type.endswith("Blueprint") else "MiscItems"
+            inventory[bucket].append(
+                {"ItemType": item_type, "ItemCount": rng.choice([1, 1, 1, 2, 3])}
+            )
+    for item in warframes + weapons + sentinels:
+        if rng.random() < 0.5:
+            inventory["XPInfo"].append({"ItemType": item["uniqueName"], "XP": 1000})
+
+    return exports, inventory
+
+
+# Compress the index like the real one, header size bytes claiming the wrong size
+def compress_index(index_text):
+    data = bytearray(
+        lzma.compress(index_text.encode("utf-8"), format=lzma.FORMAT_ALONE)
+    )
+    data[5:13] = (len(index_text) // 2).to_bytes(8, "little")
+    return bytes(data)
+
+
+# ----------------------- Fixture Server -----------------------
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serve the files of the FixtureServer this handler's server belongs to"""
+
+    def do_GET(self):
+        fixtures = self.server.fixtures
+        path = self.path.split("?", 1)[0]
+        fixtures.requests.append(path)
+
+        if fixtures.latency:
+            time.sleep(fixtures.latency)
+
+        if path not in fixtures.files:
+            self.send_error(404)
+            return
+        if fixtures.should_fail(path):
+            self.send_error(503)
+            return
+
+        body, etag, last_modified = fixtures.files[path]
+        # If-None-Match takes precedence over If-Modified-Since when both are sent
+        if "If-None-Match" in self.headers:
+            not_modified = self.headers["If-None-Match"] == etag
+        else:
+            not_modified = self.headers.get("If-Modified-Since") == last_modified
+        if fixtures.validators and not_modified:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        if fixtures.validators:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+        if fixtures.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=1)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """
+    Local stand-in for the Warframe content and inventory servers.
+
+    Serves the index, exports and inventory from generate_fixtures() on
+    127.0.0.1 in a background thread. latency (seconds) is added to every
+    request, failure_rate is the share of requests answered with a 503 and
+    fail_paths always fail. Paths of all requests are kept in .requests.
+    validators adds ETag / Last-Modified headers and answers matching
+    conditional requests with 304, compress gzips bodies for clients accepting it.
+
+        with FixtureServer(*generate_fixtures()) as server:
+            json_fetcher.fetch_warframe_json_data(
+                server.index_url, server.export_base, server.inventory_url, ""
+            )
+    """
+
+    def __init__(
+        self,
+        exports,
+        inventory,
+        latency=0.0,
+        failure_rate=0.0,
+        fail_paths=(),
+        seed=0,
+        port=0,
+        validators=True,
+        compress=True,
+    ):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fail_paths = set(fail_paths)
+        self.validators = validators
+        self.compress = compress
+        self.requests = []
+        self.files = {}
+        self._exports = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        for filename, data in exports.items():
+            self.set_export(filename, data)
+        self.set_inventory(inventory)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+        self._server.daemon_threads = True
+        self._server.fixtures = self
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def index_url(self):
+        return self.url + "/PublicExport/index_en.txt.lzma"
+
+    @property
+    def export_base(self):
+        return self.url + "/PublicExport/Manifest/"
+
+    @property
+    def inventory_url(self):
+        return self.url + "/api/inventory.php"
+
+    def should_fail(self, path):
+        with self._lock:
+            return path in self.fail_paths or self._rng.random() < self.failure_rate
+
+    def set_export(self, filename, data):
+        """Serve new content for an export, under a new key like the real index"""
+        body = json.dumps(data, indent=2).encode("utf-8")
+        key = hashlib.sha1(body).hexdigest()[:20]
+
+        old_key = self._exports.get(filename)
+        if old_key:
+            self.files.pop(f"/PublicExport/Manifest/{filename}!{old_key}", None)
+        self._exports[filename] = key
+        self.set_file(f"/PublicExport/Manifest/{filename}!{key}", body)
+
+        index_text = "".join(
+            f"{name}!{name_key}\r\n" for name, name_key in self._exports.items()
+        )
+        self.set_file("/PublicExport/index_en.txt.lzma", compress_index(index_text))
+
+    def set_inventory(self, inventory):
+        self.set_file("/api/inventory.php", json.dumps(inventory).encode("utf-8"))
+
+    def set_file(self, path, body):
+        """Serve body at path, with validators that change along with it"""
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.files[path] = (body, etag, formatdate(time.time(), usegmt=True))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+# ----------------------- Benchmark -----------------------
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<32}{time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def run_benchmark(server):
+    """Time a fresh and a cached fetch plus computing every view, in a temp folder"""
+    # Imported here, the WFTracker modules read their files from the working directory
+    import json_fetcher
+    import WFTracker
+    from views import VIEW_OF, require
+
+    fetch = (
+        json_fetcher.fetch_warframe_json_data,
+        server.index_url,
+        server.export_base,
+        server.inventory_url,
+        "",
+    )
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        try:
+            timed("Fetch (nothing cached)", *fetch)
+            timed("Fetch (everything cached)", *fetch)
+            timed("Compute every view", require, WFTracker.context, *VIEW_OF)
+            sizes = sum(os.path.getsize(name) for name in os.listdir(folder))
+            print(f"{'Saved files':<32}{sizes / 1024:8.0f} KiB")
+        finally:
+            os.chdir(cwd)
+    print(f"{'Requests':<32}{len(server.requests):8}")
+
+
+# ----------------------------------- Main -----------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Serve generated Warframe exports and inventory locally."
+    )
+    parser.add_argument("--sets", type=int, default=8, help="Sets of each kind.")
+    parser.add_argument("--padding", type=int, default=0, help="Filler per record.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds/request.")
+    parser.add_argument(
+        "--failure-rate", type=float, default=0.0, help="Share of requests to fail."
+    )
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument(
+        "--bench",
+        help="Run the fetch pipeline against the server and print timings.",
+        action="store_true",
+    )
+    args = parser.parse_args()
+
+    server = FixtureServer(
+        *generate_fixtures(args.sets, args.seed, args.padding),
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+        port=args.port,
+    )
+    with server:
+        if args.bench:
+            run_benchmark(server)
+        else:
+            print(f"Index:     {server.index_url}")
+            print(f"Exports:   {server.export_base}")
+            print(f"Inventory: {server.inventory_url}")
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
+
+# ----------------------------------- END OF FILE -----------------------------------
@@ -1,63 +1,135 @@
+import functools
 import json
 import re
 
-# ----------------------- Load Into Caches -----------------------
+import settings
+from export_store import EXPORT_FILES, store
+from json_stream import write_atomic
 
-# Cache for JSON data to avoid reloading
-_weapon_cache = None
-_warframe_cache = None
-_recipe_cache = None
-_sentinel_cache = None
+# ----------------------- Export Data -----------------------
+
+# Precomputed uniqueName -> name table, stored next to the exports
+NAME_TABLE_FILE = "warframe_names.json"
+_name_table = None
+
+# Exports whose records are kept in the name table too, the ones fetch_base_data
+# reads, so a valid table spares loading them
+TABLE_EXPORTS = ("ExportWarframes", "ExportWeapons", "ExportSentinels")
+_table_records = None
+
+
+def _clear_name_caches():
+    """Drop the name table and memoized names, called when the export store reloads"""
+    global _name_table, _table_records
+    _name_table = None
+    _table_records = None
+    _clean_name_cache.cache_clear()
 
 
 def _load_weapon_data():
-    """Load and cache weapon data"""
-    global _weapon_cache
-    if _weapon_cache is None:
-        with open("warframe_weapons.json", encoding="utf-8") as f:
-            data = json.load(f)
-            _weapon_cache = {
-                weapon["uniqueName"]: weapon["name"]
-                for weapon in data.get("ExportWeapons", [])
-            }
-    return _weapon_cache
+    """Weapon uniqueName -> name"""
+    return store.names("ExportWeapons")
 
 
 def _load_warframe_data():
-    """Load and cache warframe/archwing data"""
-    global _warframe_cache
-    if _warframe_cache is None:
-        with open("warframe_warframes.json", encoding="utf-8") as f:
-            data = json.load(f)
-            _warframe_cache = {
-                wf["uniqueName"]: wf["name"] for wf in data.get("ExportWarframes", [])
-            }
-    return _warframe_cache
+    """Warframe/archwing uniqueName -> name"""
+    return store.names("ExportWarframes")
 
 
 def _load_recipe_data():
-    """Load and cache recipe data"""
-    global _recipe_cache
-    if _recipe_cache is None:
-        with open("warframe_recipes.json", encoding="utf-8") as f:
-            data = json.load(f)
-            _recipe_cache = {
-                recipe["uniqueName"]: recipe for recipe in data.get("ExportRecipes", [])
-            }
-    return _recipe_cache
+    """Recipe uniqueName -> recipe"""
+    return store.by_unique_name("ExportRecipes")
+
+
+def _load_recipe_index():
+    """
+    Return the reverse recipe indexes as (ingredient_index, result_index).
+
+    ingredient_index maps an ingredient ItemType to the recipe names consuming it and
+    result_index maps a resultType to the recipe names producing it, in file order.
+    """
+    return store.recipes_by_ingredient(), store.recipes_by_result_type()
 
 
 def _load_sentinel_data():
-    """Load and cache sentinel data"""
-    global _sentinel_cache
-    if _sentinel_cache is None:
-        with open("warframe_sentinels.json", encoding="utf-8") as f:
-            data = json.load(f)
-            _sentinel_cache = {
-                sentinel["uniqueName"]: sentinel["name"]
-                for sentinel in data.get("ExportSentinels", [])
-            }
-    return _sentinel_cache
+    """Sentinel uniqueName -> name"""
+    return store.names("ExportSentinels")
+
+
+# ----------------------- Persistent Name Table -----------------------
+
+
+def _name_table_version(export_keys):
+    """Pick the index keys of the exports that names are resolved from"""
+    version = {
+        filename: export_keys.get(filename) for filename in EXPORT_FILES.values()
+    }
+    if None in version.values():
+        return None
+    return version
+
+
+def load_name_table(export_keys):
+    """
+    Load the on-disk name table if it was built from the given exports.
+
+    export_keys maps each local export file to its PublicExport "filename!key",
+    as saved by json_fetcher. Returns True when the table is in use.
+    """
+    global _name_table, _table_records
+    version = _name_table_version(export_keys)
+    if version is None:
+        return False
+
+    try:
+        with open(NAME_TABLE_FILE, encoding="utf-8") as f:
+            table = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return False
+
+    # Tables of older versions don't have the records
+    if table.get("version") != version or "records" not in table:
+        return False
+
+    _name_table = table["names"]
+    _table_records = table["records"]
+    return True
+
+
+def save_name_table(export_keys):
+    """
+    Resolve every uniqueName in the exports and write the name table for them.
+
+    The records of TABLE_EXPORTS are saved with it, see table_records().
+    """
+    global _name_table, _table_records
+    version = _name_table_version(export_keys)
+    if version is None:
+        return
+
+    recipes = _load_recipe_data()
+    ingredient_index, result_index = _load_recipe_index()
+    unique_names = set(recipes)
+    unique_names.update(ingredient_index)
+    unique_names.update(result_index)
+    unique_names.update(_load_weapon_data())
+    unique_names.update(_load_warframe_data())
+    unique_names.update(_load_sentinel_data())
+    unique_names.discard(None)
+
+    names = {unique_name: _resolve_name(unique_name) for unique_name in unique_names}
+    records = {export: store.records(export) for export in TABLE_EXPORTS}
+    table = {"version": version, "names": names, "records": records}
+    write_atomic(NAME_TABLE_FILE, json.dumps(table, ensure_ascii=False).encode("utf-8"))
+    _name_table = names
+    _table_records = records
+
+
+def table_records(export):
+    """Records of one of TABLE_EXPORTS from the name table, None if it isn't in use"""
+    if _table_records is None:
+        return None
+    return _table_records[export]
 
 
 # ----------------------- Lookup and name matching -----------------------
@@ -67,63 +139,61 @@ def _lookup_weapon_part_name(item_type):
     """Look up weapon part name by finding the matching weapon and part type"""
     recipes = _load_recipe_data()
     weapons = _load_weapon_data()
+    ingredient_index, _ = _load_recipe_index()
 
     # Try to find the weapon blueprint that uses this part
-    for recipe_name, recipe in recipes.items():
+    for recipe_name in ingredient_index.get(item_type, ()):
         if "Recipes/Weapons" in recipe_name and recipe_name.endswith("Blueprint"):
-            # Check if this recipe has our item_type as an ingredient
-            for ingredient in recipe.get("ingredients", []):
-                if ingredient.get("ItemType") == item_type:
-                    # Found the weapon that uses this part
-                    # Get the weapon name from the result type
-                    result_type = recipe.get("resultType")
-                    if result_type in weapons:
-                        weapon_name = weapons[result_type]
-                        # Extract just the part name (LowerLimb, String, Grip, etc)
-                        part_base_name = item_type.split("/")[-1]
-
-                        # Remove common weapon part prefixes that are redundant with weapon name
-                        # This all started with me wanting Paris Prime to show "Paris Prime Lower Limb" instead of "Paris PrimeBow Lower Limb"
-                        # I swear this API sucks, I want to beg DE to rewrite the entire thing...
-
-                        # Try to intelligently remove the weapon prefix
-                        # Start by splitting on capital letters that represent part types
-                        part_types = [
-                            "Blade",
-                            "Hilt",
-                            "String",
-                            "Hook",
-                            "Barrel",
-                            "Receiver",
-                            "Stock",
-                            "Link",
-                            "Guard",
-                            "Handle",
-                            "Lower",
-                            "Upper",
-                            "Grip",
-                            "Scope",
-                            "Magazine",
-                            "Ammo",
-                            "Head",
-                        ]
-
-                        # Find which part type is in the name and extract from there
-                        for part_type in part_types:
-                            if part_type in part_base_name:
-                                # Find the index of this part type and take everything from there
-                                idx = part_base_name.find(part_type)
-                                if idx > 0:
-                                    # Extract from the part type onwards
-                                    relevant_part = part_base_name[idx:]
-                                    part_formatted = _format_name(relevant_part)
-                                    result = f"{weapon_name} {part_formatted}".strip()
-                                    return _remove_duplicate_names(result)
-
-                        # Fallback: just format the whole thing
-                        part_formatted = _format_name(part_base_name)
-                        result = f"{weapon_name} {part_formatted}".strip()
-                        return _remove_duplicate_names(result)
+            # Found the weapon that uses this part
+            # Get the weapon name from the result type
+            result_type = recipes[recipe_name].get("resultType")
+            if result_type in weapons:
+                weapon_name = weapons[result_type]
+                # Extract just the part name (LowerLimb, String, Grip, etc)
+                part_base_name = item_type.split("/")[-1]
+
+                # Remove common weapon part prefixes that are redundant with weapon name
+                # This all started with me wanting Paris Prime to show "Paris Prime Lower Limb" instead of "Paris PrimeBow Lower Limb"
+                # I swear this API sucks, I want to beg DE to rewrite the entire thing...
+
+                # Try to intelligently remove the weapon prefix
+                # Start by splitting on capital letters that represent part types
+                part_types = [
+                    "Blade",
+                    "Hilt",
+                    "String",
+                    "Hook",
+                    "Barrel",
+                    "Receiver",
+                    "Stock",
+                    "Link",
+                    "Guard",
+                    "Handle",
+                    "Lower",
+                    "Upper",
+                    "Grip",
+                    "Scope",
+                    "Magazine",
+                    "Ammo",
+                    "Head",
+                ]
+
+                # Find which part type is in the name and extract from there
+                for part_type in part_types:
+                    if part_type in part_base_name:
+                        # Find the index of this part type and take everything from there
+                        idx = part_base_name.find(part_type)
+                        if idx > 0:
+                            # Extract from the part type onwards
+                            relevant_part = part_base_name[idx:]
+                            part_formatted = _format_name(relevant_part)
+                            result = f"{weapon_name} {part_formatted}".strip()
+                            return _remove_duplicate_names(result)
+
+                # Fallback: just format the whole thing
+                part_formatted = _format_name(part_base_name)
+                result = f"{weapon_name} {part_formatted}".strip()
+                return _remove_duplicate_names(result)
 
     # Fallback: just format the part name
     base_name = item_type.split("/")[-1]
@@ -134,32 +204,29 @@ def _lookup_warframe_part_name(item_type):
     """Look up warframe part name by finding the matching component recipe and warframe"""
     recipes = _load_recipe_data()
     warframes = _load_warframe_data()
+    ingredient_index, result_index = _load_recipe_index()
 
     # Try to find a recipe for this part (Neuroptics, Chassis, Systems components)
-    for recipe_name, recipe in recipes.items():
+    for recipe_name in result_index.get(item_type, ()):
         if "Recipes/Warframes" in recipe_name:
-            if recipe.get("resultType") == item_type:
-                # Found the recipe that produces this part
-                # Now find the warframe blueprint recipe that uses this part
-                for bp_recipe_name, bp_recipe in recipes.items():
-                    if (
-                        "Recipes/Warframes" in bp_recipe_name
-                        and bp_recipe_name.endswith("Blueprint")
-                    ):
-                        for ingredient in bp_recipe.get("ingredients", []):
-                            if ingredient.get("ItemType") == item_type:
-                                # Found the warframe blueprint that uses this part
-                                result_type = bp_recipe.get("resultType")
-                                if result_type in warframes:
-                                    warframe_name = warframes[result_type]
-                                    # Extract part type (Neuroptics, Chassis, Systems)
-                                    part_base_name = item_type.split("/")[-1]
-                                    part_formatted = _format_name(part_base_name)
-                                    return f"{warframe_name} {part_formatted}".strip()
-
-                # Fallback: just use the recipe name
-                base_name = recipe_name.split("/")[-1]
-                return _format_name(base_name)
+            # Found the recipe that produces this part
+            # Now find the warframe blueprint recipe that uses this part
+            for bp_recipe_name in ingredient_index.get(item_type, ()):
+                if "Recipes/Warframes" in bp_recipe_name and bp_recipe_name.endswith(
+                    "Blueprint"
+                ):
+                    # Found the warframe blueprint that uses this part
+                    result_type = recipes[bp_recipe_name].get("resultType")
+                    if result_type in warframes:
+                        warframe_name = warframes[result_type]
+                        # Extract part type (Neuroptics, Chassis, Systems)
+                        part_base_name = item_type.split("/")[-1]
+                        part_formatted = _format_name(part_base_name)
+                        return f"{warframe_name} {part_formatted}".strip()
+
+            # Fallback: just use the recipe name
+            base_name = recipe_name.split("/")[-1]
+            return _format_name(base_name)
 
     return None
 
@@ -168,48 +235,46 @@ def _lookup_archwing_part_name(item_type):
     """Look up archwing part name by finding the matching component recipe and archwing"""
     recipes = _load_recipe_data()
     warframes = _load_warframe_data()
+    ingredient_index, result_index = _load_recipe_index()
 
     # Try to find a recipe for this part
-    for recipe_name, recipe in recipes.items():
+    for recipe_name in result_index.get(item_type, ()):
         if "Archwing" in recipe_name and "Recipes" in recipe_name:
-            if recipe.get("resultType") == item_type:
-                # Found the recipe that produces this part
-                # Now find the archwing blueprint recipe that uses this part
-                for bp_recipe_name, bp_recipe in recipes.items():
-                    if (
-                        "Archwing" in bp_recipe_name
-                        and "Recipes" in bp_recipe_name
-                        and bp_recipe_name.endswith("Blueprint")
-                    ):
-                        for ingredient in bp_recipe.get("ingredients", []):
-                            if ingredient.get("ItemType") == item_type:
-                                # Found the archwing blueprint that uses this part
-                                result_type = bp_recipe.get("resultType")
-                                if result_type in warframes:
-                                    archwing_name = warframes[result_type]
-                                    # Format the archwing name (remove <ARCHWING> tag)
-                                    archwing_name = _format_name(archwing_name)
-                                    # Extract part type (Wings, Chassis, Systems)
-                                    part_base_name = item_type.split("/")[-1]
-
-                                    # Remove "Prime" and "Archwing" prefixes from part name
-                                    if part_base_name.startswith("PrimeArchwing"):
-                                        part_base_name = part_base_name[
-                                            13:
-                                        ]  # Remove "PrimeArchwing"
-                                    elif part_base_name.startswith("Prime"):
-                                        part_base_name = part_base_name[
-                                            5:
-                                        ]  # Remove "Prime" otherwise give double prime *facepalm* example: "Odonata Prime Prime Harness" due to API formatting.
-                                    part_formatted = _format_name(part_base_name)
-                                    # Convert "Chassis" to "Harness" for archwings (they have chassis in the API, probably reused from warframes)
-                                    if part_formatted == "Chassis":
-                                        part_formatted = "Harness"
-                                    return f"{archwing_name} {part_formatted}".strip()
-
-                # Fallback: just use the recipe name
-                base_name = recipe_name.split("/")[-1]
-                return _format_name(base_name)
+            # Found the recipe that produces this part
+            # Now find the archwing blueprint recipe that uses this part
+            for bp_recipe_name in ingredient_index.get(item_type, ()):
+                if (
+                    "Archwing" in bp_recipe_name
+                    and "Recipes" in bp_recipe_name
+                    and bp_recipe_name.endswith("Blueprint")
+                ):
+                    # Found the archwing blueprint that uses this part
+                    result_type = recipes[bp_recipe_name].get("resultType")
+                    if result_type in warframes:
+                        archwing_name = warframes[result_type]
+                        # Format the archwing name (remove <ARCHWING> tag)
+                        archwing_name = _format_name(archwing_name)
+                        # Extract part type (Wings, Chassis, Systems)
+                        part_base_name = item_type.split("/")[-1]
+
+                        # Remove "Prime" and "Archwing" prefixes from part name
+                        if part_base_name.startswith("PrimeArchwing"):
+                            part_base_name = part_base_name[
+                                13:
+                            ]  # Remove "PrimeArchwing"
+                        elif part_base_name.startswith("Prime"):
+                            part_base_name = part_base_name[
+                                5:
+                            ]  # Remove "Prime" otherwise give double prime *facepalm* example: "Odonata Prime Prime Harness" due to API formatting.
+                        part_formatted = _format_name(part_base_name)
+                        # Convert "Chassis" to "Harness" for archwings (they have chassis in the API, probably reused from warframes)
+                        if part_formatted == "Chassis":
+                            part_formatted = "Harness"
+                        return f"{archwing_name} {part_formatted}".strip()
+
+            # Fallback: just use the recipe name
+            base_name = recipe_name.split("/")[-1]
+            return _format_name(base_name)
 
     return None
 
@@ -218,38 +283,37 @@ def _lookup_sentinel_part_name(item_type):
     """Look up sentinel part name by finding the matching component recipe and sentinel"""
     recipes = _load_recipe_data()
     sentinels = _load_sentinel_data()
+    ingredient_index, _ = _load_recipe_index()
 
     # Find the sentinel blueprint recipe that uses this part
-    for bp_recipe_name, bp_recipe in recipes.items():
+    for bp_recipe_name in ingredient_index.get(item_type, ()):
         if (
             "Sentinel" in bp_recipe_name
             and "Recipes" in bp_recipe_name
             and bp_recipe_name.endswith("Blueprint")
         ):
-            for ingredient in bp_recipe.get("ingredients", []):
-                if ingredient.get("ItemType") == item_type:
-                    # Found the sentinel blueprint that uses this part
-                    result_type = bp_recipe.get("resultType")
-                    if result_type in sentinels:
-                        sentinel_name = sentinels[result_type]
-                        # Extract part type (Cerebrum, Carapace, Systems)
-                        part_base_name = item_type.split("/")[-1]
-
-                        # Remove "Prime" prefix from part name since it's in the sentinel name
-                        if part_base_name.startswith("Prime"):
-                            part_base_name = part_base_name[5:]  # Remove "Prime"
-
-                        # Also remove the sentinel name prefix to avoid duplication
-                        # e.g., "HeliosCerebrum" -> "Cerebrum" (when sentinel is "Helios Prime")
-                        sentinel_base = sentinel_name.split()[
-                            0
-                        ]  # Get just "Helios" from "Helios Prime"
-                        if part_base_name.startswith(sentinel_base):
-                            part_base_name = part_base_name[len(sentinel_base) :]
-
-                        part_formatted = _format_name(part_base_name)
-                        result = f"{sentinel_name} {part_formatted}".strip()
-                        return _remove_duplicate_names(result)
+            # Found the sentinel blueprint that uses this part
+            result_type = recipes[bp_recipe_name].get("resultType")
+            if result_type in sentinels:
+                sentinel_name = sentinels[result_type]
+                # Extract part type (Cerebrum, Carapace, Systems)
+                part_base_name = item_type.split("/")[-1]
+
+                # Remove "Prime" prefix from part name since it's in the sentinel name
+                if part_base_name.startswith("Prime"):
+                    part_base_name = part_base_name[5:]  # Remove "Prime"
+
+                # Also remove the sentinel name prefix to avoid duplication
+                # e.g., "HeliosCerebrum" -> "Cerebrum" (when sentinel is "Helios Prime")
+                sentinel_base = sentinel_name.split()[
+                    0
+                ]  # Get just "Helios" from "Helios Prime"
+                if part_base_name.startswith(sentinel_base):
+                    part_base_name = part_base_name[len(sentinel_base) :]
+
+                part_formatted = _format_name(part_base_name)
+                result = f"{sentinel_name} {part_formatted}".strip()
+                return _remove_duplicate_names(result)
 
     return None
 
@@ -319,7 +383,33 @@ def clean_name(name_str):
     - Warframe/Archwing parts: extracts from recipe data
     - Sentinels: matches against warframe_sentinels.json
     - Sentinel parts: extracts from recipe data
+
+    Uses the precomputed name table when load_name_table() accepted it.
+    Results are memoized (up to settings.NAME_CACHE_SIZE names) until the export store reloads.
     """
+    return _clean_name_cache(name_str)
+
+
+def _lookup_name(name_str):
+    """Resolve a name from the name table when loaded, else from the export data"""
+    if _name_table is None:
+        return _resolve_name(name_str)
+
+    name = _name_table.get(name_str)
+    if name is None:
+        # The table covers every uniqueName in the exports, anything else only gets formatted
+        base_name = name_str.split("/")[-1]
+        name = _remove_duplicate_names(_format_name(base_name))
+    return name
+
+
+def clean_name_cache_info():
+    """Return the (hits, misses, maxsize, currsize) counters of the clean_name cache"""
+    return _clean_name_cache.cache_info()
+
+
+def _resolve_name(name_str):
+    """Uncached name resolution behind clean_name"""
     lower_name = name_str.lower()
 
     # Try sentinel match first (before weapon match since sentinel parts can be in WeaponParts folder)
@@ -411,3 +501,8 @@ def clean_name(name_str):
     base_name = name_str.split("/")[-1]
     result = _format_name(base_name)
     return _remove_duplicate_names(result)
+
+
+# Bounded LRU cache in front of _lookup_name, cleared whenever the export store reloads
+_clean_name_cache = functools.lru_cache(maxsize=settings.NAME_CACHE_SIZE)(_lookup_name)
+store.on_invalidate(_clear_name_caches)
@@ -0,0 +1,183 @@
+import gzip
+import hashlib
+import json
+import os
+
+import requests
+
+CACHE_FOLDER = "./http_cache/"
+
+# Bytes read from a response or cached body per step
+CHUNK_SIZE = 1 << 14
+
+# ----------------------- HTTP Cache -----------------------
+
+
+class HttpCache:
+    """
+    Bodies of earlier responses with their ETag / Last-Modified validators.
+
+    Requests for a cached URL are sent as conditional requests. When the server
+    answers 304 Not Modified the body is read back from the cache instead of
+    being downloaded again. Bodies are kept gzip compressed.
+
+    A new body only replaces the cached one once the caller has checked it and
+    called commit(), so a broken response is never revalidated as current.
+
+    A caller that saves the body to a file of its own passes it as body_path,
+    the entry then only keeps the validators. Those are used while the file is
+    left as it was when committed.
+    """
+
+    def __init__(self, folder=CACHE_FOLDER):
+        self.folder = folder
+        self._entries = None
+        # key -> (temporary body file or None, etag, last_modified, body_path)
+        # waiting for commit()
+        self._pending = {}
+
+    def _entries_path(self):
+        return os.path.join(self.folder, "entries.json")
+
+    def _body_path(self, key):
+        return os.path.join(self.folder, hashlib.sha1(key.encode()).hexdigest() + ".gz")
+
+    @property
+    def entries(self):
+        """
+        {key: {"etag", "last_modified", "data", "body_path", "body_stat"}} of the
+        cached bodies, the last two set for bodies the caller saved itself
+        """
+        if self._entries is None:
+            try:
+                with open(self._entries_path(), encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self._entries = {}
+        return self._entries
+
+    def _save_entries(self):
+        os.makedirs(self.folder, exist_ok=True)
+        temp_path = self._entries_path() + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2)
+        os.replace(temp_path, self._entries_path())
+
+    def _file_stat(self, path):
+        """[mtime_ns, size] of a file, None if there is none"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _has_body(self, key, entry):
+        if entry.get("body_path"):
+            # The caller's file, unless it was changed or removed since
+            return self._file_stat(entry["body_path"]) == entry.get("body_stat")
+        return os.path.exists(self._body_path(key))
+
+    def validators(self, key):
+        """Conditional request headers for the cached body of key, if there is one"""
+        entry = self.entries.get(key)
+        if not entry or not self._has_body(key, entry):
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def get(self, url, key=None, headers=None, session=None, body_path=None):
+        """
+        Request url, revalidating the cached body of key (url by default).
+
+        Returns (modified, chunks), chunks yields the body either way. A modified
+        body with validators is saved while chunks is read to the end, and cached
+        once commit(key) is called. With body_path the caller saves the body
+        there itself before calling commit(key), and a 304 is read from it.
+        """
+        key = key or url
+        request = session.get if session else requests.get
+        resp = request(
+            url, headers={**(headers or {}), **self.validators(key)}, stream=True
+        )
+
+        if resp.status_code == 304:
+            resp.close()
+            return False, self._read_body(key, self.entries[key].get("body_path"))
+
+        try:
+            resp.raise_for_status()
+        except requests.exceptions.HTTPError:
+            resp.close()
+            raise
+        return True, self._save_body(key, resp, body_path)
+
+    def _read_body(self, key, body_path=None):
+        if body_path:
+            f = open(body_path, "rb")
+        else:
+            f = gzip.open(self._body_path(key), "rb")
+        with f:
+            while chunk := f.read(CHUNK_SIZE):
+                yield chunk
+
+    def _save_body(self, key, resp, body_path=None):
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+
+        with resp:
+            if not etag and not last_modified:
+                # Nothing to revalidate it with next time
+                if self.entries.pop(key, None):
+                    self._save_entries()
+                yield from resp.iter_content(CHUNK_SIZE)
+                return
+
+            if body_path:
+                yield from resp.iter_content(CHUNK_SIZE)
+                self._pending[key] = (None, etag, last_modified, body_path)
+                return
+
+            os.makedirs(self.folder, exist_ok=True)
+            temp_path = self._body_path(key) + ".tmp"
+            with gzip.open(temp_path, "wb", compresslevel=1) as f:
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    yield chunk
+
+        # Only a body that was read completely can be committed
+        self._pending[key] = (temp_path, etag, last_modified, None)
+
+    def commit(self, key, data=None):
+        """
+        Cache the body just read for key, after the caller has checked it.
+
+        data (anything json can store, e.g. what was parsed from the body) is
+        kept with it and returned by data(key), so an unchanged body needn't be
+        parsed again. Does nothing if no body is waiting to be committed.
+        """
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        temp_path, etag, last_modified, body_path = pending
+
+        entry = {"etag": etag, "last_modified": last_modified, "data": data}
+        if body_path:
+            entry["body_path"] = body_path
+            entry["body_stat"] = self._file_stat(body_path)
+        else:
+            os.replace(temp_path, self._body_path(key))
+        self.entries[key] = entry
+        self._save_entries()
+
+    def data(self, key):
+        """The data committed with the cached body of key, None if there is none"""
+        return self.entries.get(key, {}).get("data")
+
+
+# The cache shared by json_fetcher and inventory_fetcher
+cache = HttpCache()
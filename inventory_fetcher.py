@@ -1,9 +1,21 @@
+import ctypes
+import errno
 import json
+import mmap
+import multiprocessing
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import parse_qs
 
 import requests
 
+import settings
+from http_cache import cache
+from json_stream import validate_json, write_json_bytes
+
+INVENTORY_URL = "https://api.warframe.com/api/inventory.php"
+
 if os.name == "nt":
     try:
         import pymem
@@ -77,113 +89,450 @@ def get_nonce_windows():
     return None
 
 
-def get_nonce_linux():
-    process_name = "Warframe.x64.exe"
-    pid = None
+# ?accountId=
+AUTH_PATTERN = b"\x3f\x61\x63\x63\x6f\x75\x6e\x74\x49\x64\x3d"
 
-    # 1. Find the PID (Process ID)
+# Bytes after a pattern match that the auth string can reach:
+# 42 to the nonce (11 ?accountId= + 24 ID + 7 &nonce=) and 64 for its digits
+AUTH_TAIL = 42 + 64
+
+# Bytes of a memory region searched per read, windows overlap by AUTH_TAIL
+SCAN_WINDOW = 1 << 20
+
+# Regions outside these sizes are skipped
+# Lower bound: 2^12 (4 KiB - 1 page)
+# Upper bound: 2^28 (256 MiB - arbitrary sanity check)
+MIN_REGION_SIZE = 4096
+MAX_REGION_SIZE = 268435456
+
+# Bytes of regions handed to a scan worker at a time (parallel scan)
+SCAN_BATCH_SIZE = 1 << 26
+
+# Most windows gathered into one process_vm_readv call by VmReader. Together
+# they fill at most one window's buffer, so this only helps small regions.
+VM_READ_WINDOWS = 64
+PAGE_SIZE = mmap.PAGESIZE
+
+# Set in each scan worker process by _init_scan_worker
+_worker_reader = None
+_worker_stop = None
+
+
+def find_pid(process_name):
     # We iterate over /proc
-    try:
-        for dirname in os.listdir("/proc"):
-            if dirname.isdigit():
-                try:
-                    with open(f"/proc/{dirname}/cmdline", "rb") as f:
-                        cmdline = f.read().decode().replace("\0", " ")
-                        if process_name in cmdline:
-                            pid = int(dirname)
-                            break
-                except (IOError, OSError):
-                    continue
-    except Exception as e:
-        print(f"Error scanning processes: {e}")
-        return None
+    for dirname in os.listdir("/proc"):
+        if dirname.isdigit():
+            try:
+                with open(f"/proc/{dirname}/cmdline", "rb") as f:
+                    cmdline = f.read().decode().replace("\0", " ")
+                    if process_name in cmdline:
+                        return int(dirname)
+            except (IOError, OSError):
+                continue
+    return None
 
-    if pid is None:
-        print(f"Could not find process: {process_name}")
+
+# (start, end) addresses of the memory regions that can hold the auth string
+def auth_regions(pid):
+    regions = []
+    with open(f"/proc/{pid}/maps", "r") as maps_file:
+        for line in maps_file:
+            # Parse map line: 00400000-00452000 r-xp ...
+            parts = line.split()
+            if not parts:
+                continue
+
+            # Filter: We only want readable/writable private memory (heap/stack)
+            # 'rw' is standard for valid data segments in Wine/Proton
+            if "rw" not in parts[1]:
+                continue
+
+            start_str, end_str = parts[0].split("-")
+            start_addr = int(start_str, 16)
+            end_addr = int(end_str, 16)
+
+            # Skip massive empty regions or tiny fragments to save time
+            if MIN_REGION_SIZE <= end_addr - start_addr <= MAX_REGION_SIZE:
+                regions.append((start_addr, end_addr))
+    return regions
+
+
+# Decode the auth string of a pattern match at found_idx, None if there's no nonce
+def read_auth(data, found_idx):
+    # Read 64 bytes (2^6) from the nonce position to ensure we capture all digits
+    nonce_start = found_idx + 42
+    raw_nonce_area = bytes(data[nonce_start : nonce_start + 64])
+
+    # raw bytes (hex) to readable text (or, well... numbers in this case)
+    decoded = raw_nonce_area.decode("utf-8", errors="ignore")
+
+    match = re.match(r"^\d+", decoded)
+    if not match:
         return None
+    nonce = match.group(0)
+
+    # Extract the Account ID (24 characters long, +11 from pattern start)
+    acc_id_data = bytes(data[found_idx + 11 : found_idx + 11 + 24])
+    acc_id = acc_id_data.decode("utf-8", errors="ignore")
+
+    return f"?accountId={acc_id}&nonce={nonce}"
+
+
+# Search a window read into buffer[offset : offset + length] for the auth string
+def find_auth(buffer, offset, length):
+    window = memoryview(buffer)[offset : offset + length]
+
+    # Matches starting past the window are found again by the next one
+    search_end = offset + min(length, SCAN_WINDOW + len(AUTH_PATTERN) - 1)
+    found_idx = buffer.find(AUTH_PATTERN, offset, search_end)
+    while found_idx != -1:
+        full_auth = read_auth(window, found_idx - offset)
+        if full_auth:
+            return full_auth
+        found_idx = buffer.find(AUTH_PATTERN, found_idx + 1, search_end)
+    return None
+
+
+# (region number, address, length) of the windows the regions are read in
+def region_windows(regions):
+    for region, (start_addr, end_addr) in enumerate(regions):
+        for position in range(start_addr, end_addr, SCAN_WINDOW):
+            yield region, position, min(SCAN_WINDOW + AUTH_TAIL, end_addr - position)
+
+
+def scan_region(mem_file, start_addr, end_addr, buffer, stop_event=None):
+    """
+    Search one memory region for the auth string, a window at a time.
+
+    buffer (a bytearray of SCAN_WINDOW + AUTH_TAIL bytes) is reused for every
+    read, so memory use doesn't depend on the region size. Each window is read
+    with the AUTH_TAIL bytes after it, so a match near its end is still complete.
+    Returns the first decoded auth string, or None (also once stop_event is set).
+    """
+    view = memoryview(buffer)
+
+    for _, position, length in region_windows([(start_addr, end_addr)]):
+        if stop_event is not None and stop_event.is_set():
+            return None
+        mem_file.seek(position)
+        length = mem_file.readinto(view[:length])
+        if not length:
+            return None
+
+        full_auth = find_auth(buffer, 0, length)
+        if full_auth:
+            return full_auth
+    return None
+
+
+# Scan regions in order, returns the first auth string or None
+def scan_regions(mem_file, regions, buffer, stop_event=None):
+    for start_addr, end_addr in regions:
+        try:
+            full_auth = scan_region(mem_file, start_addr, end_addr, buffer, stop_event)
+        except (OSError, ValueError):
+            # Region might be protected or changed during read
+            continue
+        if full_auth:
+            return full_auth
+    return None
+
+
+# Consecutive regions grouped into batches of about batch_size bytes
+def region_batches(regions, batch_size=SCAN_BATCH_SIZE):
+    batches = []
+    batch, batch_bytes = [], 0
+    for start_addr, end_addr in regions:
+        batch.append((start_addr, end_addr))
+        batch_bytes += end_addr - start_addr
+        if batch_bytes >= batch_size:
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+# ----------------------- Memory Readers -----------------------
+
+
+class ProcMemReader:
+    """Reads the game's memory through /proc/<pid>/mem, a seek + read per window"""
+
+    def __init__(self, pid):
+        self.mem_file = open(f"/proc/{pid}/mem", "rb", 0)
+        self.buffer = bytearray(SCAN_WINDOW + AUTH_TAIL)
+
+    def scan(self, regions, stop_event=None):
+        return scan_regions(self.mem_file, regions, self.buffer, stop_event)
 
-    # 2. Define Pattern
-    # ?accountId=
-    pattern = b"\x3f\x61\x63\x63\x6f\x75\x6e\x74\x49\x64\x3d"
+    def close(self):
+        self.mem_file.close()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+def _load_process_vm_readv():
+    """libc's process_vm_readv, or None where there is none"""
     try:
-        maps_path = f"/proc/{pid}/maps"
-        mem_path = f"/proc/{pid}/mem"
+        readv = ctypes.CDLL(None, use_errno=True).process_vm_readv
+    except (OSError, AttributeError, TypeError):
+        return None
+    readv.argtypes = [
+        ctypes.c_int,
+        ctypes.POINTER(_IOVec),
+        ctypes.c_ulong,
+        ctypes.POINTER(_IOVec),
+        ctypes.c_ulong,
+        ctypes.c_ulong,
+    ]
+    readv.restype = ctypes.c_ssize_t
+    return readv
+
+
+class VmReader:
+    """
+    Reads the game's memory with process_vm_readv.
+
+    Windows are read into one buffer of SCAN_WINDOW + AUTH_TAIL bytes, the same
+    as ProcMemReader's. Up to VM_READ_WINDOWS windows of small regions that fit
+    in it together are gathered into one syscall, a window of a big region
+    fills it alone. A read stops at the first window that can't be read whole. That window is read again page by
+    page and its readable start searched, like a short read of /proc/<pid>/mem,
+    and the windows after it are read in the next call. As with ProcMemReader a
+    region is only skipped from a window whose first byte can't be read.
+
+    Unlike /proc/<pid>/mem, process_vm_readv doesn't force its way past page
+    protections. That only matters inside an rw region whose protection changed
+    after auth_regions() read the maps; such pages are skipped here.
+    """
+
+    def __init__(self, pid, readv, windows=VM_READ_WINDOWS):
+        self.pid = pid
+        self.readv = readv
+        self.buffer = bytearray(SCAN_WINDOW + AUTH_TAIL)
+        self.local = (_IOVec * windows)()
+        self.remote = (_IOVec * windows)()
+        # Where in buffer each window of the last _read() went
+        self.offsets = [0] * windows
+
+        # One iovec per page for reading a window that failed
+        pages = len(self.buffer) // PAGE_SIZE + 2
+        self.page_local = (_IOVec * pages)()
+        self.page_remote = (_IOVec * pages)()
+
+        self.base = ctypes.addressof(
+            (ctypes.c_char * len(self.buffer)).from_buffer(self.buffer)
+        )
+
+    def _readv(self, local, remote, count):
+        """Returns bytes read, 0 if the first iovec isn't readable"""
+        read = self.readv(self.pid, local, count, remote, count, 0)
+        if read < 0:
+            error = ctypes.get_errno()
+            if error != errno.EFAULT:
+                raise OSError(error, os.strerror(error))
+            return 0
+        return read
+
+    def _read(self, batch):
+        """Read the (region, address, length) windows of batch one after another"""
+        offset = 0
+        for i, (_, address, length) in enumerate(batch):
+            self.offsets[i] = offset
+            self.local[i].iov_base = self.base + offset
+            self.local[i].iov_len = length
+            offset += length
+            self.remote[i].iov_base = address
+            self.remote[i].iov_len = length
+        return self._readv(self.local, self.remote, len(batch))
+
+    def _read_pages(self, i, address, length):
+        """Read window i of the last batch page by page, returns the readable length"""
+        count = 0
+        position = address
+        while position < address + length:
+            page_end = min(address + length, (position // PAGE_SIZE + 1) * PAGE_SIZE)
+            self.page_local[count].iov_base = (
+                self.local[i].iov_base + position - address
+            )
+            self.page_local[count].iov_len = page_end - position
+            self.page_remote[count].iov_base = position
+            self.page_remote[count].iov_len = page_end - position
+            count += 1
+            position = page_end
+        return self._readv(self.page_local, self.page_remote, count)
+
+    def scan(self, regions, stop_event=None):
+        windows = region_windows(regions)
+        failed = set()
+        batch = []
+        # A window that didn't fit in the buffer with the batch before it
+        window = None
+
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                return None
+
+            # Fill up the batch, dropping windows of regions that failed to read
+            batch = [queued for queued in batch if queued[0] not in failed]
+            used = sum(length for _, _, length in batch)
+            while len(batch) < len(self.local):
+                if window is None:
+                    window = next(windows, None)
+                    if window is None:
+                        break
+                if window[0] in failed:
+                    window = None
+                elif used + window[2] <= len(self.buffer):
+                    batch.append(window)
+                    used += window[2]
+                    window = None
+                else:
+                    break
+            if not batch:
+                return None
+
+            try:
+                read = self._read(batch)
+            except OSError:
+                # Like scan_regions: skip the region of the window that failed
+                failed.add(batch[0][0])
+                batch = batch[1:]
+                continue
+
+            # Reads stop at the first byte that can't be read
+            for i, (region, address, length) in enumerate(batch):
+                whole = read >= length
+                if whole:
+                    read -= length
+                else:
+                    try:
+                        length = self._read_pages(i, address, length)
+                    except OSError:
+                        length = 0
+                    # Nothing readable: /proc/<pid>/mem raises here, skip the region
+                    if not length:
+                        failed.add(region)
+
+                full_auth = find_auth(self.buffer, self.offsets[i], length)
+                if full_auth:
+                    return full_auth
+                if not whole:
+                    batch = batch[i + 1 :]
+                    break
+            else:
+                batch = []
 
-        # 3. Scan Memory Regions
-        with open(maps_path, "r") as maps_file, open(mem_path, "rb", 0) as mem_file:
-            for line in maps_file:
-                # Parse map line: 00400000-00452000 r-xp ...
-                parts = line.split()
-                if not parts:
-                    continue
+    def close(self):
+        pass
 
-                address_range = parts[0]
-                perms = parts[1]
+    def __enter__(self):
+        return self
 
-                # Filter: We only want readable/writable private memory (heap/stack)
-                # 'rw' is standard for valid data segments in Wine/Proton
-                if "rw" not in perms:
-                    continue
+    def __exit__(self, *exc_info):
+        self.close()
 
-                start_str, end_str = address_range.split("-")
-                start_addr = int(start_str, 16)
-                end_addr = int(end_str, 16)
-                size = end_addr - start_addr
 
-                # Skip massive empty regions or tiny fragments to save time
-                # Lower bound: 2^12 (4 KiB - 1 page)
-                # Upper bound: 2^28 (256 MiB - arbitrary sanity check)
-                if size < 4096 or size > 268435456:
-                    continue
+def _usable_readv(pid, regions):
+    """process_vm_readv if it can read the game, None if it's missing or blocked"""
+    readv = _load_process_vm_readv()
+    if readv is None or not regions:
+        return None
 
-                try:
-                    mem_file.seek(start_addr)
-                    # Read the chunk
-                    chunk = mem_file.read(size)
+    # Read a single byte, e.g. seccomp can block the syscall altogether
+    byte = ctypes.create_string_buffer(1)
+    local = _IOVec(ctypes.addressof(byte), 1)
+    remote = _IOVec(regions[0][0], 1)
+    if readv(pid, local, 1, remote, 1, 0) < 0 and ctypes.get_errno() != errno.EFAULT:
+        return None
+    return readv
 
-                    if chunk:
-                        # Search for pattern in this chunk
-                        found_idx = chunk.find(pattern)
 
-                        while found_idx != -1:
-                            # 4. Offset Calculation & Extraction
-                            # Found Pattern Address = start_addr + found_idx
-                            # Target (Nonce) Address = Found Address + 42 bytes
+def open_reader(pid, regions):
+    """A VmReader where process_vm_readv works, a ProcMemReader otherwise"""
+    readv = _usable_readv(pid, regions)
+    if readv is not None:
+        return VmReader(pid, readv)
+    return ProcMemReader(pid)
 
-                            # 11 bytes (?accountId=) + 24 bytes (ID) + 7 bytes (&nonce=)
 
-                            nonce_start_offset = found_idx + 42
+# ----------------------- Nonce Scan -----------------------
 
-                            # Read 64 bytes (2^6) from the nonce position to ensure we capture all digits
-                            # Slicing the chunk is faster than seeking/reading again
-                            raw_nonce_area = chunk[
-                                nonce_start_offset : nonce_start_offset + 64
-                            ]
 
-                            # raw bytes (hex) to readable text (or, well... numbers in this case)
-                            decoded = raw_nonce_area.decode("utf-8", errors="ignore")
+def _init_scan_worker(pid, regions, stop_event):
+    """Give a scan worker process its own memory reader"""
+    global _worker_reader, _worker_stop
+    _worker_reader = open_reader(pid, regions)
+    _worker_stop = stop_event
 
-                            match = re.match(r"^\d+", decoded)
-                            if match:
-                                nonce = match.group(0)
 
-                                # Extract Account ID (+11 from pattern start)
-                                acc_id_start = found_idx + 11
+def _scan_batch(regions):
+    """Worker for scan_parallel: scan a batch of regions"""
+    return _worker_reader.scan(regions, _worker_stop)
 
-                                # Extract the ID (24 characters long)
-                                acc_id_data = chunk[acc_id_start : acc_id_start + 24]
-                                acc_id = acc_id_data.decode("utf-8", errors="ignore")
 
-                                full_auth = f"?accountId={acc_id}&nonce={nonce}"
-                                return full_auth
+def scan_parallel(pid, regions, workers):
+    """
+    Split the regions across worker processes, each with its own reader.
 
-                            # Find next occurrence in the same chunk
-                            found_idx = chunk.find(pattern, found_idx + 1)
+    The first auth string found stops the others: batches not started yet are
+    cancelled and running ones return at their next window.
+    """
+    # Fail here rather than in every worker, without a reader's buffer
+    if _usable_readv(pid, regions) is None:
+        open(f"/proc/{pid}/mem", "rb", 0).close()
 
-                except (OSError, ValueError):
-                    # Region might be protected or changed during read
-                    continue
+    batches = region_batches(regions)
+    stop_event = multiprocessing.Event()
+    with ProcessPoolExecutor(
+        max_workers=max(1, min(workers, len(batches))),
+        initializer=_init_scan_worker,
+        initargs=(pid, regions[:1], stop_event),
+    ) as pool:
+        futures = [pool.submit(_scan_batch, batch) for batch in batches]
+        for future in as_completed(futures):
+            full_auth = future.result()
+            if full_auth:
+                stop_event.set()
+                for other in futures:
+                    other.cancel()
+                return full_auth
+    return None
+
+
+def get_nonce_linux():
+    process_name = "Warframe.x64.exe"
+
+    # 1. Find the PID (Process ID)
+    try:
+        pid = find_pid(process_name)
+    except Exception as e:
+        print(f"Error scanning processes: {e}")
+        return None
+
+    if pid is None:
+        print(f"Could not find process: {process_name}")
+        return None
+
+    try:
+        # 2. Scan Memory Regions until the first valid auth string
+        regions = auth_regions(pid)
+        if settings.PARALLEL_NONCE_SCAN:
+            full_auth = scan_parallel(pid, regions, os.cpu_count() or 1)
+        else:
+            with open_reader(pid, regions) as reader:
+                full_auth = reader.scan(regions)
+        if full_auth:
+            return full_auth
 
     except PermissionError:
         print("Permission Denied: Run with sudo/root to read process memory.")
@@ -194,32 +543,48 @@ def get_nonce_linux():
     return None
 
 
-def fetch_and_save_inventory():
-    # 1. Construct the URL
-    base_url = str("https://api.warframe.com/api/inventory.php")
-    if os.name == "nt":
-        auth_string = str(get_nonce_windows())
-    else:
-        auth_string = str(get_nonce_linux())
+# Cache key of an account's inventory, the nonce changes every session
+def inventory_cache_key(base_url, auth_string):
+    account_id = parse_qs(auth_string.lstrip("?")).get("accountId", [""])[0]
+    return f"{base_url}?accountId={account_id}"
+
+
+def fetch_and_save_inventory(inventory_url=INVENTORY_URL, auth_string=None):
+    # 1. Construct the URL (auth_string is read from the game unless given)
+    base_url = str(inventory_url)
+    if auth_string is None:
+        if os.name == "nt":
+            auth_string = str(get_nonce_windows())
+        else:
+            auth_string = str(get_nonce_linux())
     target_url = base_url + auth_string
 
     try:
         # 2. Execute Request
         # Set a user-agent to avoid being blocked by basic filters
         headers = {"User-Agent": "Warframe/1.0"}
-        response = requests.get(target_url, headers=headers)
+        # Revalidated per account, inventory.json is the cached body itself
+        # Raises for HTTP errors (4xx or 5xx)
+        filename = "inventory.json"
+        cache_key = inventory_cache_key(base_url, auth_string)
+        modified, chunks = cache.get(
+            target_url, key=cache_key, headers=headers, body_path=filename
+        )
 
-        # Check for HTTP errors (4xx or 5xx)
-        response.raise_for_status()
+        # Nothing to re-parse or save if the inventory didn't change
+        if not modified:
+            return
 
         # 3. Validate JSON
         # We parse it first to ensure we didn't just download an HTML error page
-        data = response.json()
+        data = b"".join(chunks)
+        validate_json(data)
 
-        # 4. Save to Disk
-        filename = "inventory.json"
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
+        # 4. Save to Disk (the bytes as they came, replacing the old file at once)
+        write_json_bytes(filename, data, indent=4)
+
+        # Only a valid inventory is revalidated next time
+        cache.commit(cache_key)
 
     except requests.exceptions.HTTPError as e:
         print(f"HTTP Error: {e}")
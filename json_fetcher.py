@@ -1,33 +1,83 @@
+import codecs
 import json
 import lzma
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from requests.adapters import HTTPAdapter
 
 import inventory_fetcher
+from export_store import EXPORT_FIELDS, EXPORT_FILES, slim_record, store
+from http_cache import cache
+from json_stream import validate_json, write_atomic, write_json, write_json_bytes
 
 INDEX_URL = "https://origin.warframe.com/PublicExport/index_en.txt.lzma"
 PUBLIC_EXPORT_BASE = "http://content.warframe.com/PublicExport/Manifest/"
 OUTPUT_FOLDER = "./"
+MANIFEST_FILE = OUTPUT_FOLDER + "export_manifest.json"
+
+# Local file -> export, for the exports saved with only the fields WFTracker reads
+SLIM_EXPORTS = {filename: export for export, filename in EXPORT_FILES.items()}
+# Local file -> format saved with it in the manifest, changes whenever its
+# EXPORT_FIELDS do, so a slim file missing a field is re-downloaded
+SLIM_FORMATS = {
+    filename: json.dumps(EXPORT_FIELDS[export])
+    for export, filename in EXPORT_FILES.items()
+}
+
+# Exports downloaded at the same time
+DOWNLOAD_WORKERS = 4
+
+_session = None
+
+
+def get_session():
+    """Shared keep-alive session, with a connection per download worker"""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=DOWNLOAD_WORKERS)
+        _session.mount("http://", adapter)
+        _session.mount("https://", adapter)
+    return _session
+
+
+def index_lines(chunks):
+    """Yield the lines of the index while its chunks download and decompress"""
+    decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_ALONE)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    position = 0
+    pending = ""
+
+    for chunk in chunks:
+        # --- IN-Place Fix --- (Not sure if there's a better way to fix this)
+        # The file header (first 13 bytes) apparently often claims the wrong size for the file.
+        # Setting bytes 5-12 to 0xFF (meaning "Unknown Size")
+        # forces Python to decode everything until the end of the stream.
+        if position < 13:
+            chunk = bytearray(chunk)
+            for i in range(max(5, position), min(13, position + len(chunk))):
+                chunk[i - position] = 0xFF
+        position += len(chunk)
+
+        # Keep reading past the end of the stream, so the whole body can be cached
+        if decompressor.eof:
+            continue
+        pending += decoder.decode(decompressor.decompress(chunk))
 
+        # Hand out every complete line, keep the rest for the next chunk
+        *lines, pending = pending.split("\n")
+        yield from lines
 
-def download_index():
-    resp = requests.get(INDEX_URL)
-    resp.raise_for_status()
-
-    # --- IN-Place Fix --- (Not sure if there's a better way to fix this)
-    # The file header (first 13 bytes) apparently often claims the wrong size for the file.
-    # Setting bytes 5-12 to 0xFF (meaning "Unknown Size")
-    # forces Python to decode everything until the end of the stream.
-    content = bytearray(resp.content)
-    for i in range(5, 13):
-        content[i] = 0xFF
-
-    return lzma.decompress(content, format=lzma.FORMAT_ALONE).decode("utf-8")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
 
 
-def parse_entries(index_text):
+def parse_entries(lines):
     entries = {}
-    for line in index_text.splitlines():
+    for line in lines:
         line = line.strip()
         if not line or "!" not in line:
             continue
@@ -36,31 +86,103 @@ def parse_entries(index_text):
     return entries
 
 
-def download_json(filename, key):
-    url = PUBLIC_EXPORT_BASE + f"{filename}!{key}"
-    r = requests.get(url)
+def fetch_index_entries(index_url=INDEX_URL):
+    """{export filename: content key} of the index"""
+    modified, chunks = cache.get(index_url, session=get_session())
+
+    # An unchanged index is answered with a 304, reuse what it was parsed to
+    if not modified and cache.data(index_url) is not None:
+        return cache.data(index_url)
+
+    entries = parse_entries(index_lines(chunks))
+    # Only an index that decompressed and listed exports is worth revalidating
+    if modified and entries:
+        cache.commit(index_url, entries)
+    return entries
+
+
+def download_json(filename, key, export_base=PUBLIC_EXPORT_BASE):
+    url = export_base + f"{filename}!{key}"
+    r = get_session().get(url)
     r.raise_for_status()
-    # Return text so we can save it or parse it
-    return r.text
+    # Return the raw bytes so we can save them or parse them
+    return r.content
 
 
-def save_json(data_text, local_name):
-    # Try to parse to ensure it's valid JSON, then save formatted
+def save_json(data, local_name):
+    # Check it's valid JSON, then save the bytes as they came
     try:
-        parsed = json.loads(data_text)
-        with open(local_name, "w", encoding="utf-8") as f:
-            json.dump(parsed, f, indent=2, ensure_ascii=False)
+        validate_json(data)
+        write_json_bytes(local_name, data)
     except json.JSONDecodeError:
         print(f"Warning: {local_name} is not valid JSON. Saving raw text.")
-        with open(local_name, "w", encoding="utf-8") as f:
-            f.write(data_text)
+        write_atomic(local_name, data)
+
+
+def save_slim_export(data, export, local_name):
+    """Save only the fields of an export that WFTracker reads, as compact JSON"""
+    try:
+        records = json.loads(data)[export]
+    except (json.JSONDecodeError, KeyError):
+        print(f"Warning: {local_name} is not a valid {export} export. Saving raw text.")
+        write_atomic(local_name, data)
+        return
+
+    write_json(
+        local_name, {export: [slim_record(export, record) for record in records]}
+    )
+
 
+def load_manifest():
+    """
+    Load the manifest of the last downloaded exports.
 
-def fetch_warframe_json_data():
+    Maps each local file to {"export": "filename!key", "format": ...}, format
+    being its SLIM_FORMATS entry (None for files saved in full). Entries of
+    older versions are left out, so those files are downloaded again.
+    """
+    try:
+        with open(MANIFEST_FILE, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return {name: entry for name, entry in manifest.items() if isinstance(entry, dict)}
+
+
+def export_keys():
+    """{local file: "filename!key"} of the last downloaded exports"""
+    return {name: entry["export"] for name, entry in load_manifest().items()}
+
+
+def save_manifest(manifest):
+    write_atomic(MANIFEST_FILE, json.dumps(manifest, indent=2).encode("utf-8"))
+
+
+# Download and save one export, returns its "filename!key" or None if it failed
+def fetch_export(
+    filename, key, local_path, slim_export, export_base=PUBLIC_EXPORT_BASE
+):
+    try:
+        raw_json = download_json(filename, key, export_base)
+        if slim_export:
+            save_slim_export(raw_json, slim_export, local_path)
+        else:
+            save_json(raw_json, local_path)
+        return f"{filename}!{key}"
+    except Exception as e:
+        print(f"Failed to fetch {filename}: {e}")
+        return None
+
+
+def fetch_warframe_json_data(
+    index_url=INDEX_URL,
+    export_base=PUBLIC_EXPORT_BASE,
+    inventory_url=inventory_fetcher.INVENTORY_URL,
+    auth_string=None,
+):
     try:
         # 1. Get the index
-        index_text = download_index()
-        entries = parse_entries(index_text)
+        entries = fetch_index_entries(index_url)
 
         # 2. Define what to fetch
         interesting_files = {
@@ -71,21 +193,52 @@ def fetch_warframe_json_data():
             "ExportRelicArcane_en.json": "warframe_relic_arcanes.json",
         }
 
-        # 3. Fetch files
+        # 3. Fetch files whose content key changed since the last download
+        manifest = load_manifest()
+        downloads = {}
         for filename, output_name in interesting_files.items():
             if filename not in entries:
                 print(f"Skipping {filename} (not found in index)")
                 continue
 
             key = entries[filename]
-            try:
-                raw_json_text = download_json(filename, key)
-                save_json(raw_json_text, OUTPUT_FOLDER + output_name)
-            except Exception as e:
-                print(f"Failed to fetch {filename}: {e}")
+            local_path = OUTPUT_FOLDER + output_name
+
+            # The key changes whenever the file's content does, and a file saved
+            # by an older version may be missing fields
+            if manifest.get(output_name) == {
+                "export": f"{filename}!{key}",
+                "format": SLIM_FORMATS.get(output_name),
+            } and os.path.exists(local_path):
+                continue
+            downloads[output_name] = (
+                filename,
+                key,
+                local_path,
+                SLIM_EXPORTS.get(output_name),
+                export_base,
+            )
+
+        # Download them side by side, so it takes about as long as the largest file
+        if downloads:
+            with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+                futures = {
+                    output_name: pool.submit(fetch_export, *args)
+                    for output_name, args in downloads.items()
+                }
+            for output_name, future in futures.items():
+                if future.result():
+                    manifest[output_name] = {
+                        "export": future.result(),
+                        "format": SLIM_FORMATS.get(output_name),
+                    }
+
+            save_manifest(manifest)
+            # Everything parsed from the old files is stale now
+            store.invalidate()
 
         # 4. Fetch Warframe Inventory JSON data
-        inventory_fetcher.fetch_and_save_inventory()
+        inventory_fetcher.fetch_and_save_inventory(inventory_url, auth_string)
 
     except Exception as e:
         print(f"CRITICAL ERROR: {e}")
@@ -0,0 +1,137 @@
+import json
+import os
+
+# Characters read from the file per step while decoding
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+
+# Decodes every object to None, so checking a document never builds all of it
+_validator = json.JSONDecoder(object_pairs_hook=lambda pairs: None)
+
+# Save JSON files indented for reading them by hand (WFTracker --pretty-json)
+PRETTY_JSON = False
+
+
+def _skip_whitespace(buffer, pos):
+    while pos < len(buffer) and buffer[pos] in " \t\r\n":
+        pos += 1
+    return pos
+
+
+def iter_array(f, key, chunk_size=CHUNK_SIZE):
+    """
+    Yield the items of the array stored under `key` in a JSON object file, one at a time.
+
+    Only the item being decoded and the unread part of the current chunk are held
+    in memory, so a consumer can start working before the whole file is read.
+    Raises json.JSONDecodeError if the file ends early or isn't shaped like
+    {"key": [{...}, ...]}.
+    """
+    buffer = ""
+    eof = False
+
+    def fill(buffer):
+        nonlocal eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        return buffer + chunk
+
+    # 1. Find the opening bracket of the array
+    marker = f'"{key}"'
+    search_from = 0
+    while True:
+        start = buffer.find(marker, search_from)
+        if start != -1:
+            pos = _skip_whitespace(buffer, start + len(marker))
+            if pos < len(buffer) and buffer[pos] != ":":
+                # Same text used as a string value, keep looking
+                search_from = start + 1
+                continue
+            pos = _skip_whitespace(buffer, pos + 1)
+            if pos < len(buffer):
+                if buffer[pos] != "[":
+                    raise json.JSONDecodeError("Expected '['", buffer, pos)
+                break
+        else:
+            search_from = max(0, len(buffer) - len(marker))
+
+        if eof:
+            raise json.JSONDecodeError(f"Key {key} not found", buffer, len(buffer))
+        buffer = fill(buffer)
+
+    buffer = buffer[pos + 1 :]
+    pos = 0
+
+    # 2. Decode one item at a time, reading more whenever an item is cut off
+    while True:
+        pos = _skip_whitespace(buffer, pos)
+        if pos < len(buffer) and buffer[pos] == ",":
+            pos = _skip_whitespace(buffer, pos + 1)
+
+        if pos >= len(buffer):
+            if eof:
+                raise json.JSONDecodeError("Unterminated array", buffer, pos)
+            buffer = fill(buffer[pos:])
+            pos = 0
+            continue
+
+        if buffer[pos] == "]":
+            return
+
+        try:
+            item, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            buffer = fill(buffer[pos:])
+            pos = 0
+            continue
+
+        # A number cut off by the end of a chunk still decodes, "0." as 0 and
+        # "1e" as 1, so it's only whole once a delimiter follows it
+        if not eof and (end == len(buffer) or buffer[end] not in " \t\r\n,]"):
+            buffer = fill(buffer[pos:])
+            pos = 0
+            continue
+
+        yield item
+        pos = end
+
+
+# ----------------------- Saving -----------------------
+
+
+def validate_json(data):
+    """Raise json.JSONDecodeError unless the bytes are one valid JSON document"""
+    try:
+        text = data.decode(json.detect_encoding(data), "surrogatepass")
+    except UnicodeDecodeError as e:
+        raise json.JSONDecodeError(f"Invalid encoding: {e}", "", 0) from None
+    _validator.decode(text)
+
+
+def write_atomic(path, data):
+    """Write bytes to path through a temporary file, so readers never see half of it"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def write_json_bytes(path, data, indent=2):
+    """Save valid JSON bytes as they are, or indented if PRETTY_JSON is set"""
+    if PRETTY_JSON:
+        data = json.dumps(json.loads(data), indent=indent, ensure_ascii=False)
+        data = data.encode("utf-8")
+    write_atomic(path, data)
+
+
+def write_json(path, obj, indent=2):
+    """Save obj as compact JSON, or indented if PRETTY_JSON is set"""
+    if PRETTY_JSON:
+        text = json.dumps(obj, indent=indent, ensure_ascii=False)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    write_atomic(path, text.encode("utf-8"))
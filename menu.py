@@ -147,8 +147,8 @@ MASTERED_ITEMS = [
 OPTIONS = [
     {
         "label": "Update Inventory",
-        "func": "fetch_inventory_data",
-        "args": ("warframe_inventory",),
+        "func": "update_inventory",
+        "args": ("context",),
     },
     {
         "label": "Settings Menu",
@@ -0,0 +1,117 @@
+# ----------------------- Interned Names -----------------------
+
+
+class NameIds:
+    """Dense integer IDs for names, handed out in first-seen order"""
+
+    __slots__ = ("_ids", "_names")
+
+    def __init__(self):
+        self._ids = {}
+        self._names = []
+
+    def id(self, name):
+        """Return the ID of name, giving it the next free one if it has none"""
+        name_id = self._ids.get(name)
+        if name_id is None:
+            name_id = len(self._names)
+            self._ids[name] = name_id
+            self._names.append(name)
+        return name_id
+
+    def get(self, name):
+        """Return the ID of name, or None if it was never interned"""
+        return self._ids.get(name)
+
+    def name(self, name_id):
+        return self._names[name_id]
+
+
+# The IDs shared by every NameSet, so their masks can be combined directly
+name_ids = NameIds()
+
+
+# ----------------------- Name Set -----------------------
+
+
+class NameSet:
+    """
+    A set of names stored as a bitmask over their interned IDs.
+
+    Behaves like a set of strings for the menus, while union, intersection and
+    difference between NameSets are single int operations on the masks.
+    """
+
+    __slots__ = ("mask",)
+
+    def __init__(self, names=(), mask=0):
+        self.mask = mask
+        for name in names:
+            self.mask |= 1 << name_ids.id(name)
+
+    # ----------------------- Set API -----------------------
+
+    def add(self, name):
+        self.mask |= 1 << name_ids.id(name)
+
+    def discard(self, name):
+        name_id = name_ids.get(name)
+        if name_id is not None:
+            self.mask &= ~(1 << name_id)
+
+    def update(self, names):
+        for name in names:
+            self.mask |= 1 << name_ids.id(name)
+
+    def clear(self):
+        self.mask = 0
+
+    def union(self, *others):
+        mask = self.mask
+        for other in others:
+            mask |= other.mask
+        return NameSet(mask=mask)
+
+    def __contains__(self, name):
+        name_id = name_ids.get(name)
+        return name_id is not None and bool(self.mask >> name_id & 1)
+
+    def __iter__(self):
+        mask = self.mask
+        while mask:
+            low_bit = mask & -mask
+            yield name_ids.name(low_bit.bit_length() - 1)
+            mask ^= low_bit
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def __bool__(self):
+        return self.mask != 0
+
+    def __eq__(self, other):
+        if isinstance(other, NameSet):
+            return self.mask == other.mask
+        return NotImplemented
+
+    __hash__ = None
+
+    def __or__(self, other):
+        return NameSet(mask=self.mask | other.mask)
+
+    def __and__(self, other):
+        return NameSet(mask=self.mask & other.mask)
+
+    def __sub__(self, other):
+        return NameSet(mask=self.mask & ~other.mask)
+
+    def __ior__(self, other):
+        self.mask |= other.mask
+        return self
+
+    def __isub__(self, other):
+        self.mask &= ~other.mask
+        return self
+
+    def __repr__(self):
+        return f"NameSet({sorted(self)!r})"
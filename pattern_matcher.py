@@ -0,0 +1,48 @@
+# ----------------------- Multi-Pattern Matcher -----------------------
+
+
+class PatternMatcher:
+    """
+    Index of patterns by the text before an anchor substring they share.
+
+    search(text) tells whether any pattern occurs in text. Instead of a substring
+    test per pattern it finds each occurrence of the anchor in text, and only
+    compares the patterns whose prefix before the anchor is the text right in
+    front of it. Texts without the anchor are rejected with a single find().
+    Patterns without the anchor are tested one by one.
+    """
+
+    __slots__ = ("_anchor", "_by_offset", "_rest")
+
+    def __init__(self, patterns, anchor):
+        self._anchor = anchor
+        # [(offset of the anchor, {text before the anchor: [patterns]})] by offset
+        by_offset = {}
+        self._rest = []
+
+        for pattern in patterns:
+            offset = pattern.find(anchor) if anchor else -1
+            if offset < 0:
+                self._rest.append(pattern)
+                continue
+            prefixes = by_offset.setdefault(offset, {})
+            prefixes.setdefault(pattern[:offset], []).append(pattern)
+        self._by_offset = sorted(by_offset.items())
+
+    def search(self, text):
+        """Return True if any pattern is a substring of text"""
+        if any(pattern in text for pattern in self._rest):
+            return True
+
+        anchor = self._anchor
+        at = text.find(anchor) if self._by_offset else -1
+        while at >= 0:
+            for offset, prefixes in self._by_offset:
+                if offset > at:
+                    break
+                start = at - offset
+                for pattern in prefixes.get(text[start:at], ()):
+                    if text.startswith(pattern, start):
+                        return True
+            at = text.find(anchor, at + 1)
+        return False
@@ -4,8 +4,9 @@ import time
 from prettytable import PrettyTable
 
 import settings
-from fetch import fetch_inventory_data
 from menu import START_MENU, SUBMENU_MAPPING
+from update import update_inventory
+from views import invalidate, require
 
 # ----------------------- Global Context -----------------------
 # This dictionary holds all the data structures needed by menu functions
@@ -109,6 +110,9 @@ def print_selection(index, menu_items, from_submenu=False):
 
     func_name = selection["func"]
 
+    # Compute the views this option shows, unless they already are
+    require(_context, *selection.get("args", ()))
+
     # Build the namespace with context values and functions
     local_namespace = _context.copy()
 
@@ -122,7 +126,8 @@ def print_selection(index, menu_items, from_submenu=False):
             "print_weapon_set_progress_as_table": print_weapon_set_progress_as_table,
             "print_sentinel_set_progress_as_table": print_sentinel_set_progress_as_table,
             "print_sellable_prime_sets_as_table": print_sellable_prime_sets_as_table,
-            "fetch_inventory_data": fetch_inventory_data,
+            "update_inventory": update_inventory,
+            "context": _context,
             "settings_menu": settings.settings_menu,
         }
     )
@@ -143,10 +148,13 @@ def print_selection(index, menu_items, from_submenu=False):
         print(f"Error: Function '{func_name}' not found.")
 
     # Skip the "go back" prompt when updating inventory or going to settings
-    if func_name == "fetch_inventory_data" or func_name == "settings_menu":
-        if func_name == "fetch_inventory_data":
+    if func_name == "update_inventory" or func_name == "settings_menu":
+        if func_name == "update_inventory":
             print("Inventory updated!")
             time.sleep(0.75)
+        else:
+            # Settings change what's read from the inventory and which sets are shown
+            invalidate(_context)
         main_menu(_context)
     else:
         go_back = ""
@@ -184,6 +192,16 @@ def print_set_as_table(input_set, title):
     print(table)
 
 
+# Shared row builder for the fixed-column set tables (warframes, archwings, sentinels)
+def set_progress_row(entry):
+    return [
+        entry.name,
+        has_part(entry.blueprint.bp_count, entry.blueprint.comp_count),
+        *(has_part(part.bp_count, part.comp_count) for part in entry.parts),
+        f"{entry.progress}/{entry.total}",
+    ]
+
+
 # For prime_warframe_sets.
 def print_warframe_set_progress_as_table(prime_warframe_set, title):
     table = PrettyTable(
@@ -193,34 +211,8 @@ def print_warframe_set_progress_as_table(prime_warframe_set, title):
     table.sortby = "Progress"
     table.reversesort = True
 
-    # Sort by name
     for entry in prime_warframe_set.values():
-        bp_bp, bp_comp = entry["blueprint"][1], entry["blueprint"][2]
-        neu_bp, neu_comp = entry["neuroptics"][1], entry["neuroptics"][2]
-        cha_bp, cha_comp = entry["chassis"][1], entry["chassis"][2]
-        sys_bp, sys_comp = entry["systems"][1], entry["systems"][2]
-
-        # Add 1 to progress for each part owned (either built or blueprint)
-        progress = sum(
-            1
-            for counts in [
-                (bp_bp, bp_comp),
-                (neu_bp, neu_comp),
-                (cha_bp, cha_comp),
-                (sys_bp, sys_comp),
-            ]
-            if counts[0] >= 1 or counts[1] >= 1
-        )
-
-        row = [
-            entry["name"],
-            has_part(bp_bp, bp_comp),
-            has_part(neu_bp, neu_comp),
-            has_part(cha_bp, cha_comp),
-            has_part(sys_bp, sys_comp),
-            f"{progress}/4",
-        ]
-        table.add_row(row)
+        table.add_row(set_progress_row(entry))
     print(table)
 
 
@@ -234,32 +226,7 @@ def print_archwing_set_progress_as_table(archwing_set, title):
     table.reversesort = True
 
     for entry in archwing_set.values():
-        bp_bp, bp_comp = entry["blueprint"][1], entry["blueprint"][2]
-        har_bp, har_comp = entry["harness"][1], entry["harness"][2]
-        wing_bp, wing_comp = entry["wings"][1], entry["wings"][2]
-        sys_bp, sys_comp = entry["systems"][1], entry["systems"][2]
-
-        # Add 1 to progress for each part owned (either built or blueprint)
-        progress = sum(
-            1
-            for counts in [
-                (bp_bp, bp_comp),
-                (har_bp, har_comp),
-                (wing_bp, wing_comp),
-                (sys_bp, sys_comp),
-            ]
-            if counts[0] >= 1 or counts[1] >= 1
-        )
-
-        row = [
-            entry["name"],
-            has_part(bp_bp, bp_comp),
-            has_part(har_bp, har_comp),
-            has_part(wing_bp, wing_comp),
-            has_part(sys_bp, sys_comp),
-            f"{progress}/4",
-        ]
-        table.add_row(row)
+        table.add_row(set_progress_row(entry))
     print(table)
 
 
@@ -272,24 +239,16 @@ def print_weapon_set_progress_as_table(prime_weapon_set, title):
 
     for entry in prime_weapon_set.values():
         # Use full weapon name + "Blueprint" instead of just "Blueprint"
-        blueprint_name = f"{entry['name']} Blueprint"
-        parts_str_list = [f"{blueprint_name}: {entry['blueprint'][1]}"]
-        amount = 1
-        progress = 0
-
-        if entry["blueprint"][1] >= 1:
-            progress += 1
+        blueprint_name = f"{entry.name} Blueprint"
+        parts_str_list = [f"{blueprint_name}: {entry.blueprint.bp_count}"]
 
-        for part_name, bp_count, comp_count in entry["parts"]:
-            if comp_count >= 1 or bp_count >= 1:
-                progress += 1
-            amount += 1
-            parts_str_list.append(f"{part_name}: {comp_count + bp_count}")
+        for part in entry.parts:
+            parts_str_list.append(f"{part.name}: {part.comp_count + part.bp_count}")
 
-        progress_str = f"Progress: {progress}/{amount}"
+        progress_str = f"Progress: {entry.progress}/{entry.total}"
         formatted_parts = ", ".join(parts_str_list)
 
-        table.add_row([entry["name"], formatted_parts, progress_str])
+        table.add_row([entry.name, formatted_parts, progress_str])
     print(table)
 
 
@@ -303,32 +262,7 @@ def print_sentinel_set_progress_as_table(sentinel_set, title):
     table.reversesort = True
 
     for entry in sentinel_set.values():
-        bp_bp, bp_comp = entry["blueprint"][1], entry["blueprint"][2]
-        cer_bp, cer_comp = entry["cerebrum"][1], entry["cerebrum"][2]
-        car_bp, car_comp = entry["carapace"][1], entry["carapace"][2]
-        sys_bp, sys_comp = entry["systems"][1], entry["systems"][2]
-
-        # Add 1 to progress for each part owned (either built or blueprint)
-        progress = sum(
-            1
-            for counts in [
-                (bp_bp, bp_comp),
-                (cer_bp, cer_comp),
-                (car_bp, car_comp),
-                (sys_bp, sys_comp),
-            ]
-            if counts[0] >= 1 or counts[1] >= 1
-        )
-
-        row = [
-            entry["name"],
-            has_part(bp_bp, bp_comp),
-            has_part(cer_bp, cer_comp),
-            has_part(car_bp, car_comp),
-            has_part(sys_bp, sys_comp),
-            f"{progress}/4",
-        ]
-        table.add_row(row)
+        table.add_row(set_progress_row(entry))
     print(table)
 
 
@@ -0,0 +1,47 @@
+# ----------------------- Set Progress Records -----------------------
+
+# Part columns of each set type, in table order
+WARFRAME_PARTS = ("neuroptics", "chassis", "systems")
+ARCHWING_PARTS = ("harness", "wings", "systems")
+SENTINEL_PARTS = ("cerebrum", "carapace", "systems")
+
+
+class Part:
+    """A blueprint or part of a set with how many blueprints/components are owned"""
+
+    __slots__ = ("name", "bp_count", "comp_count")
+
+    def __init__(self, name="", bp_count=0, comp_count=0):
+        self.name = name
+        self.bp_count = bp_count
+        self.comp_count = comp_count
+
+    @property
+    def owned(self):
+        return self.bp_count >= 1 or self.comp_count >= 1
+
+
+class SetProgress:
+    """
+    A craftable set: its blueprint, its parts and how many of them are owned.
+
+    progress is counted once when the record is created, so views can sort and
+    filter on it directly.
+    """
+
+    __slots__ = ("name", "category", "blueprint", "parts", "progress")
+
+    def __init__(self, name, blueprint, parts, category=""):
+        self.name = name
+        self.category = category
+        self.blueprint = blueprint
+        self.parts = tuple(parts)
+        self.progress = blueprint.owned + sum(part.owned for part in self.parts)
+
+    @property
+    def total(self):
+        return 1 + len(self.parts)
+
+    @property
+    def complete(self):
+        return self.progress == self.total
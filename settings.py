@@ -12,6 +12,9 @@ DEFAULTS = {
     "WARFRAME_PROGRESS_FILTER": 1,  # 0–4
     "INCLUDE_NON_PRIME_WEAPONS_IN_SETS": 0,  # 0 = No | 1 = Yes
     "INCLUDE_NON_PRIME_WARFRAMES_IN_SETS": 0,  # 0 = No | 1 = Yes
+    "NAME_CACHE_SIZE": 8192,  # Max memoized clean_name results
+    "PARALLEL_EXPORT_LOADING": 0,  # 0 = No | 1 = Yes (decode exports in worker processes)
+    "PARALLEL_NONCE_SCAN": 0,  # 0 = No | 1 = Yes (scan Warframe memory on every core, Linux)
 }
 
 
@@ -64,6 +67,9 @@ INCLUDE_NON_PRIME_WEAPONS_IN_SETS = _loaded_settings[
 INCLUDE_NON_PRIME_WARFRAMES_IN_SETS = _loaded_settings[
     "INCLUDE_NON_PRIME_WARFRAMES_IN_SETS"
 ]
+NAME_CACHE_SIZE = _loaded_settings["NAME_CACHE_SIZE"]
+PARALLEL_EXPORT_LOADING = _loaded_settings["PARALLEL_EXPORT_LOADING"]
+PARALLEL_NONCE_SCAN = _loaded_settings["PARALLEL_NONCE_SCAN"]
 
 
 def get_settings():
@@ -99,6 +105,14 @@ def settings_menu():
                     f"Include Non-Prime Warframes: {'Yes' if _loaded_settings['INCLUDE_NON_PRIME_WARFRAMES_IN_SETS'] == 1 else 'No'}",
                     "INCLUDE_NON_PRIME_WARFRAMES_IN_SETS",
                 ),
+                (
+                    f"Parallel Export Loading: {'Yes' if _loaded_settings['PARALLEL_EXPORT_LOADING'] == 1 else 'No'}",
+                    "PARALLEL_EXPORT_LOADING",
+                ),
+                (
+                    f"Parallel Nonce Scan: {'Yes' if _loaded_settings['PARALLEL_NONCE_SCAN'] == 1 else 'No'}",
+                    "PARALLEL_NONCE_SCAN",
+                ),
                 (
                     f"Weapon Progress Filter: {_loaded_settings['WEAPON_PROGRESS_FILTER']}",
                     "WEAPON_PROGRESS_FILTER",
@@ -149,6 +163,32 @@ def settings_menu():
             new_value = 1 if toggle_answer["toggle_value"] else 0
             update_setting("INCLUDE_NON_PRIME_WARFRAMES_IN_SETS", new_value)
 
+    elif choice == "PARALLEL_EXPORT_LOADING":
+        toggle_questions = [
+            inquirer.Confirm(
+                "toggle_value",
+                message="Decode export files in parallel worker processes?",
+                default=False,
+            ),
+        ]
+        toggle_answer = inquirer.prompt(toggle_questions)
+        if toggle_answer:
+            new_value = 1 if toggle_answer["toggle_value"] else 0
+            update_setting("PARALLEL_EXPORT_LOADING", new_value)
+
+    elif choice == "PARALLEL_NONCE_SCAN":
+        toggle_questions = [
+            inquirer.Confirm(
+                "toggle_value",
+                message="Scan Warframe's memory for the nonce on every CPU core?",
+                default=False,
+            ),
+        ]
+        toggle_answer = inquirer.prompt(toggle_questions)
+        if toggle_answer:
+            new_value = 1 if toggle_answer["toggle_value"] else 0
+            update_setting("PARALLEL_NONCE_SCAN", new_value)
+
     elif choice == "WEAPON_PROGRESS_FILTER":
         filter_questions = [
             inquirer.List(
@@ -0,0 +1,131 @@
+import json
+
+import pytest
+
+import inventory_fetcher
+import json_fetcher
+from fixture_server import FixtureServer, generate_fixtures
+from http_cache import CHUNK_SIZE, HttpCache
+
+AUTH = "?accountId=" + "a" * 24 + "&nonce=1"
+OTHER_AUTH = "?accountId=" + "b" * 24 + "&nonce=2"
+
+
+@pytest.fixture(scope="module")
+def shared_server():
+    with FixtureServer(*generate_fixtures()) as server:
+        yield server
+
+
+@pytest.fixture
+def server(shared_server):
+    # Undo what an earlier test served
+    shared_server.set_inventory(generate_fixtures()[1])
+    return shared_server
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """A cache in a temporary working directory, used by the fetchers too"""
+    monkeypatch.chdir(tmp_path)
+    cache = HttpCache(str(tmp_path / "http_cache"))
+    monkeypatch.setattr(json_fetcher, "cache", cache)
+    monkeypatch.setattr(inventory_fetcher, "cache", cache)
+    return cache
+
+
+def get(cache, url):
+    modified, chunks = cache.get(url)
+    return modified, b"".join(chunks)
+
+
+def test_committed_body_is_revalidated(server, cache):
+    server.set_file("/file", b"first")
+    url = server.url + "/file"
+
+    assert get(cache, url) == (True, b"first")
+    cache.commit(url)
+    assert get(cache, url) == (False, b"first")
+
+    server.set_file("/file", b"second")
+    assert get(cache, url) == (True, b"second")
+
+
+def test_uncommitted_body_is_not_revalidated(server, cache):
+    server.set_file("/file", b"first")
+    url = server.url + "/file"
+    get(cache, url)
+    cache.commit(url)
+
+    # A new body the caller rejected leaves the committed one in place
+    server.set_file("/file", b"broken")
+    assert get(cache, url) == (True, b"broken")
+    assert get(cache, url) == (True, b"broken")
+
+    server.set_file("/file", b"first")
+    assert get(cache, url) == (False, b"first")
+
+
+def test_partly_read_body_cannot_be_committed(server, cache):
+    server.set_file("/file", b"x" * (CHUNK_SIZE * 4))
+    url = server.url + "/file"
+
+    modified, chunks = cache.get(url)
+    next(chunks)
+    chunks.close()
+    cache.commit(url)
+
+    assert url not in cache.entries
+    assert get(cache, url)[0]
+
+
+def test_unchanged_index_is_not_parsed_again(server, cache, monkeypatch):
+    entries = json_fetcher.fetch_index_entries(server.index_url)
+    assert "ExportRecipes_en.json" in entries
+
+    def parse_entries(lines):
+        raise AssertionError("parsed an index answered with 304")
+
+    monkeypatch.setattr(json_fetcher, "parse_entries", parse_entries)
+    assert json_fetcher.fetch_index_entries(server.index_url) == entries
+
+
+def fetch_inventory(server, auth=AUTH):
+    inventory_fetcher.fetch_and_save_inventory(server.inventory_url, auth)
+    with open("inventory.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_invalid_inventory_is_not_committed(server, cache, capsys):
+    good = fetch_inventory(server)
+
+    server.set_file("/api/inventory.php", b"<html>Service Unavailable</html>")
+    assert fetch_inventory(server) == good
+    assert "wasn't valid JSON" in capsys.readouterr().out
+    # Still refused on the next fetch, not answered from the cache with a 304
+    assert fetch_inventory(server) == good
+    assert "wasn't valid JSON" in capsys.readouterr().out
+
+    server.set_inventory({"MiscItems": [], "Recipes": [], "XPInfo": []})
+    assert fetch_inventory(server)["XPInfo"] == []
+
+
+def test_inventory_is_revalidated_per_account(server, cache, tmp_path):
+    fetch_inventory(server)
+    key = inventory_fetcher.inventory_cache_key(server.inventory_url, AUTH)
+    assert cache.validators(key)
+    # inventory.json is the cached body, nothing else is kept
+    assert not list((tmp_path / "http_cache").glob("*.gz"))
+
+    # Another account's inventory replaces the file, so the first account's
+    # entry no longer revalidates it
+    server.set_inventory({"MiscItems": [], "Recipes": [], "XPInfo": []})
+    assert fetch_inventory(server, OTHER_AUTH)["XPInfo"] == []
+    assert not cache.validators(key)
+
+
+def test_edited_inventory_is_downloaded_again(server, cache):
+    good = fetch_inventory(server)
+    with open("inventory.json", "w", encoding="utf-8") as f:
+        f.write("{}")
+    assert fetch_inventory(server) == good
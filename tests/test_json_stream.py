@@ -0,0 +1,41 @@
+import io
+import json
+
+import pytest
+
+from json_stream import iter_array
+
+SCALARS = [0.1, -25000000000.0, 1e-07, -3, 12, 2.5e300, True, None, "a,]"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1 << 16])
+def test_iter_array_scalars(chunk_size):
+    text = json.dumps({"Other": [1.5], "ExportX": SCALARS})
+    assert list(iter_array(io.StringIO(text), "ExportX", chunk_size)) == SCALARS
+
+
+@pytest.mark.parametrize("number", ["0.1", "-25000000000.0", "1E+5", "-0", "6e-3"])
+def test_iter_array_number_split_by_every_chunk(number):
+    text = f'{{"ExportX": [ {number} ,{number}]}}'
+    expected = [json.loads(number)] * 2
+    assert list(iter_array(io.StringIO(text), "ExportX", chunk_size=1)) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 1 << 16])
+def test_iter_array_records(chunk_size):
+    records = [{"uniqueName": f"/Lotus/{i}", "x": [i, {"y": i / 3}]} for i in range(20)]
+    text = json.dumps({"name": "ExportX", "ExportX": records}, indent=1)
+    assert list(iter_array(io.StringIO(text), "ExportX", chunk_size)) == records
+
+
+def test_iter_array_empty():
+    assert list(iter_array(io.StringIO('{"ExportX": [ ]}'), "ExportX", 1)) == []
+
+
+@pytest.mark.parametrize(
+    "text",
+    ['{"ExportX": [1, 2', '{"ExportY": []}', '{"ExportX": {}}', '{"ExportX": [0.}'],
+)
+def test_iter_array_malformed(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_array(io.StringIO(text), "ExportX", chunk_size=1))
@@ -0,0 +1,107 @@
+import ctypes
+import io
+import os
+import sys
+
+import pytest
+
+import inventory_fetcher
+
+# Small windows, so a few KiB of memory cross plenty of window boundaries
+WINDOW = 4096
+
+# Built from parts, so this file's own text never matches
+ACCOUNT_ID = "A" * 24
+NONCE = "1234567890123"
+AUTH = f"?account{''}Id={ACCOUNT_ID}&nonce={NONCE}"
+AUTH_BYTES = AUTH.encode()
+
+# Where an auth string can sit relative to the start of the second window
+BOUNDARY_OFFSETS = [
+    -len(AUTH_BYTES) - 1,
+    -len(AUTH_BYTES),
+    -50,
+    -42,
+    -11,
+    -10,
+    -1,
+    0,
+    1,
+]
+
+
+@pytest.fixture(autouse=True)
+def small_windows(monkeypatch):
+    monkeypatch.setattr(inventory_fetcher, "SCAN_WINDOW", WINDOW)
+
+
+def memory(size, *placed):
+    """size bytes of filler with the given (position, bytes) written over it"""
+    data = bytearray(b"." * size)
+    for position, text in placed:
+        data[position : position + len(text)] = text
+    return data
+
+
+def scan(data):
+    buffer = bytearray(WINDOW + inventory_fetcher.AUTH_TAIL)
+    return inventory_fetcher.scan_region(io.BytesIO(data), 0, len(data), buffer)
+
+
+@pytest.mark.parametrize("window", [1, 2])
+@pytest.mark.parametrize("offset", BOUNDARY_OFFSETS)
+def test_auth_at_window_boundary(window, offset):
+    position = window * WINDOW + offset
+    assert scan(memory(3 * WINDOW + 500, (position, AUTH_BYTES))) == AUTH
+
+
+@pytest.mark.parametrize("size", [len(AUTH_BYTES), WINDOW, 2 * WINDOW + 7])
+def test_auth_at_region_end(size):
+    assert scan(memory(size, (size - len(AUTH_BYTES), AUTH_BYTES))) == AUTH
+
+
+@pytest.mark.parametrize("offset", BOUNDARY_OFFSETS)
+def test_match_without_nonce_is_skipped(offset):
+    # A pattern match without digits after it, right before the real one
+    no_nonce = AUTH_BYTES[: -len(NONCE)] + b"x"
+    data = memory(
+        3 * WINDOW,
+        (WINDOW + offset, no_nonce),
+        (WINDOW + offset + len(no_nonce), AUTH_BYTES),
+    )
+    assert scan(data) == AUTH
+
+
+def test_no_auth():
+    assert scan(memory(3 * WINDOW + 500, (WINDOW - 5, AUTH_BYTES[:11]))) is None
+
+
+# ----------------------- Memory Readers -----------------------
+# Both readers scanning buffers of this very process
+
+
+def address(data):
+    return ctypes.addressof((ctypes.c_char * len(data)).from_buffer(data))
+
+
+def readers(regions):
+    pid = os.getpid()
+    yield "/proc/<pid>/mem", inventory_fetcher.ProcMemReader(pid)
+    readv = inventory_fetcher._usable_readv(pid, regions)
+    if readv is not None:
+        yield "process_vm_readv", inventory_fetcher.VmReader(pid, readv)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+@pytest.mark.parametrize("offset", BOUNDARY_OFFSETS)
+def test_readers_find_auth_at_window_boundary(offset):
+    # Many small regions share a read in VmReader, the last one spans windows
+    sizes = [100, 3000, 5000, 700, 4096, 3 * WINDOW + 500]
+    buffers = [memory(size) for size in sizes]
+    buffers[-1] = memory(sizes[-1], (2 * WINDOW + offset, AUTH_BYTES))
+    regions = [(address(data), address(data) + len(data)) for data in buffers]
+
+    for label, reader in readers(regions):
+        with reader:
+            assert reader.scan(regions) == AUTH, label
+            assert reader.scan(regions[:-1]) is None, label
@@ -0,0 +1,115 @@
+import json
+import random
+
+import pytest
+
+import WFTracker
+from export_store import EXPORT_FILES, store
+from fixture_server import generate_fixtures
+from update import update_inventory
+from views import VIEW_OF, require
+
+
+@pytest.fixture
+def exports(tmp_path, monkeypatch):
+    """Generated exports and inventory.json in a temporary working directory"""
+    monkeypatch.chdir(tmp_path)
+    exports, inventory = generate_fixtures(sets=12, seed=3)
+    for export, filename in EXPORT_FILES.items():
+        (tmp_path / filename).write_text(json.dumps(exports[f"{export}_en.json"]))
+    (tmp_path / "inventory.json").write_text(json.dumps(inventory))
+    # Nothing parsed in another test's folder may be reused
+    store.invalidate()
+    yield exports
+    store.invalidate()
+
+
+def new_context():
+    return {entry: type(value)() for entry, value in WFTracker.context.items()}
+
+
+def computed(*entries):
+    context = new_context()
+    require(context, *entries)
+    return context
+
+
+# The context entries as plain values, keeping the order of dicts
+def snapshot(context):
+    def plain(value):
+        if hasattr(value, "__slots__") and not hasattr(value, "mask"):
+            return [plain(getattr(value, slot)) for slot in value.__slots__]
+        if isinstance(value, dict):
+            return [(key, plain(item)) for key, item in value.items()]
+        if isinstance(value, (list, tuple)):
+            return [plain(item) for item in value]
+        if not isinstance(value, str) and hasattr(value, "__iter__"):
+            return sorted(repr(plain(item)) for item in value)
+        return value
+
+    return {entry: plain(context[entry]) for entry in VIEW_OF}
+
+
+def change_inventory(exports, rng):
+    """Remove, recount and add inventory items and mastered items at random"""
+    with open("inventory.json", encoding="utf-8") as f:
+        inventory = json.load(f)
+
+    for section, other in (("MiscItems", "Recipes"), ("Recipes", "MiscItems")):
+        items = inventory[section]
+        for item in rng.sample(items, min(len(items), rng.randint(0, 6))):
+            if rng.random() < 0.3:
+                items.remove(item)
+            else:
+                item["ItemCount"] = rng.randint(0, 3)
+        # The same item under both sections
+        if inventory[other] and rng.random() < 0.3:
+            item_type = rng.choice(inventory[other])["ItemType"]
+            items.append({"ItemType": item_type, "ItemCount": rng.randint(1, 3)})
+
+    gear = sorted(
+        record["uniqueName"]
+        for export in ("ExportWarframes", "ExportWeapons", "ExportSentinels")
+        for record in exports[f"{export}_en.json"][export]
+    )
+    xp_info = inventory["XPInfo"]
+    for _ in range(rng.randint(0, 4)):
+        if xp_info and rng.random() < 0.4:
+            xp_info.remove(rng.choice(xp_info))
+        else:
+            xp_info.append({"ItemType": rng.choice(gear), "XP": 1000})
+
+    with open("inventory.json", "w", encoding="utf-8") as f:
+        json.dump(inventory, f)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_update_inventory_matches_full_recompute(exports, seed):
+    rng = random.Random(seed)
+    context = computed(*VIEW_OF)
+
+    for _ in range(10):
+        change_inventory(exports, rng)
+        update_inventory(context)
+        require(context, *VIEW_OF)
+        assert snapshot(context) == snapshot(computed(*VIEW_OF))
+
+
+@pytest.mark.parametrize(
+    "entries",
+    [
+        ("warframe_name",),
+        ("mastered_prime_parts",),
+        ("duplicate_prime_parts", "unmastered_primaries"),
+        ("warframe_parts", "sellable_prime_sets"),
+    ],
+)
+def test_update_inventory_with_some_views_computed(exports, entries):
+    rng = random.Random(7)
+    context = computed(*entries)
+
+    for _ in range(5):
+        change_inventory(exports, rng)
+        update_inventory(context)
+    require(context, *VIEW_OF)
+    assert snapshot(context) == snapshot(computed(*VIEW_OF))
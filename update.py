@@ -0,0 +1,228 @@
+from export_store import PART_SUFFIXES, part_base, store
+from fetch import (
+    add_recipe_set,
+    fetch_inventory_data,
+    fetch_mastered_item_paths,
+    index_part_counts,
+)
+from filter import (
+    duplicate_count,
+    is_mastered_prime_part,
+    mastered_prime_checks,
+    mastery_buckets,
+    prime_check_matcher,
+)
+from format import clean_name
+from name_set import NameSet
+from views import invalidate, is_computed
+
+# Mastery buckets whose unmastered_* sets come from filter_unmastered_weapons
+UNMASTERED_WEAPON_BUCKETS = (
+    "primaries",
+    "secondaries",
+    "melees",
+    "amps",
+    "arch_weapons",
+    "others",
+)
+
+# Mastery buckets checked for mastered prime parts (sentinels aren't)
+PRIME_PART_BUCKETS = ("warframes",) + UNMASTERED_WEAPON_BUCKETS
+
+# ----------------------- Diffing -----------------------
+
+
+# Inventory keys that were added, removed or whose count changed
+def changed_keys(old_inventory, new_inventory):
+    return {
+        key
+        for key in old_inventory.keys() | new_inventory.keys()
+        if old_inventory.get(key) != new_inventory.get(key)
+    }
+
+
+# Recipes whose set reads any of the changed inventory keys
+def affected_recipes(changed):
+    recipes = store.by_unique_name("ExportRecipes")
+    consumers = store.recipes_by_ingredient()
+
+    affected = set()
+    for key in changed:
+        # The set's own blueprint
+        if key in recipes:
+            affected.add(key)
+
+        # Parts are counted as base, base + "Blueprint" and base + "Component"
+        for candidate in {key, part_base(key)}:
+            for ingredient in (candidate,) + tuple(
+                candidate + suffix for suffix in PART_SUFFIXES
+            ):
+                affected.update(consumers.get(ingredient, ()))
+
+    return affected
+
+
+# ----------------------- Recomputing -----------------------
+
+
+# Rebuild the sets of the affected recipes, keeping the tables in recipe order
+def update_recipe_sets(affected, context):
+    tables = [
+        context["warframe_parts"],
+        context["archwing_parts"],
+        context["weapon_parts"],
+        context["sentinel_parts"],
+    ]
+    recipes = store.by_unique_name("ExportRecipes")
+
+    for recipe_name in affected:
+        for table in tables:
+            table.pop(recipe_name, None)
+        add_recipe_set(
+            recipes[recipe_name],
+            context["warframe_name"],
+            context["archwing_name"],
+            context["weapon_name_category"],
+            context["sentinel_and_companion_name"],
+            context["warframe_inventory"],
+            context["part_counts"],
+            *tables,
+        )
+
+    for table in tables:
+        ordered = {name: table[name] for name in recipes if name in table}
+        table.clear()
+        table.update(ordered)
+
+
+# Refill the mastered buckets touched by new or removed XPInfo entries
+def update_mastery(old_paths, new_paths, context):
+    lookups = (
+        context["warframe_name"],
+        context["weapon_name_category"],
+        context["sentinel_and_companion_name"],
+    )
+    touched = {bucket for bucket, _ in mastery_buckets(old_paths ^ new_paths, *lookups)}
+
+    for bucket in touched:
+        context["mastered_or_owned_" + bucket].clear()
+    for bucket, name in mastery_buckets(new_paths, *lookups):
+        if bucket in touched:
+            context["mastered_or_owned_" + bucket].add(name)
+
+    # The unmastered lists of touched buckets are recomputed when next shown
+    if "warframes" in touched:
+        invalidate(context, "unmastered_warframes")
+    if touched.intersection(UNMASTERED_WEAPON_BUCKETS):
+        invalidate(context, "unmastered_weapons")
+    if "sentinels_and_companions" in touched:
+        invalidate(context, "unmastered_sentinels_and_companions")
+
+
+# Replace the (name, count) rows of the touched names with freshly counted ones.
+# count(item) returns None for items that don't get a row.
+def update_part_rows(rows, touched_names, warframe_inventory, count):
+    rows.difference_update({row for row in rows if row[0] in touched_names})
+
+    for item in warframe_inventory:
+        name = clean_name(item)
+        if name in touched_names:
+            item_count = count(item)
+            if item_count is not None:
+                rows.add((name, item_count))
+
+
+# ----------------------- Update Inventory -----------------------
+
+
+def update_inventory(context):
+    """
+    Re-read inventory.json and recompute only what the changes touch.
+
+    Sets are rebuilt for recipes that use a changed item, mastery buckets for
+    changed XPInfo entries and part rows for changed items. Views that haven't
+    been computed yet are left alone, they read the new inventory when first
+    shown. The results match a full fetch_items() + filter_items() run.
+    """
+    if not is_computed(context, "base"):
+        return
+
+    warframe_inventory = context["warframe_inventory"]
+    part_counts = context["part_counts"]
+    old_inventory = dict(warframe_inventory)
+    if is_computed(context, "mastered_prime_parts"):
+        old_checks = mastered_prime_checks(
+            NameSet().union(
+                *(
+                    context["mastered_or_owned_" + bucket]
+                    for bucket in PRIME_PART_BUCKETS
+                )
+            )
+        )
+
+    # 1. Diff the inventory
+    warframe_inventory.clear()
+    fetch_inventory_data(warframe_inventory)
+    index_part_counts(warframe_inventory, part_counts)
+    changed = changed_keys(old_inventory, warframe_inventory)
+
+    # 2. Diff the mastered items
+    if is_computed(context, "mastery"):
+        mastered_item_paths = context["mastered_item_paths"]
+        new_paths = fetch_mastered_item_paths()
+        if new_paths != mastered_item_paths:
+            update_mastery(mastered_item_paths, new_paths, context)
+            mastered_item_paths.clear()
+            mastered_item_paths.update(new_paths)
+
+    # 3. Sets using a changed item
+    if is_computed(context, "sets") and changed:
+        update_recipe_sets(affected_recipes(changed), context)
+
+    # 4. Mastered prime parts: changed items, and items of primes (un)mastered now
+    if is_computed(context, "mastered_prime_parts"):
+        new_checks = mastered_prime_checks(
+            NameSet().union(
+                *(
+                    context["mastered_or_owned_" + bucket]
+                    for bucket in PRIME_PART_BUCKETS
+                )
+            )
+        )
+        new_matcher = prime_check_matcher(new_checks)
+        flipped_checks = old_checks ^ new_checks
+        touched = set(changed)
+        if flipped_checks:
+            flipped_matcher = prime_check_matcher(flipped_checks)
+            touched.update(
+                item
+                for item in old_inventory.keys() | warframe_inventory.keys()
+                if is_mastered_prime_part(item, flipped_matcher)
+            )
+        update_part_rows(
+            context["mastered_prime_parts"],
+            {clean_name(item) for item in touched},
+            warframe_inventory,
+            lambda item: (
+                warframe_inventory[item]
+                if is_mastered_prime_part(item, new_matcher)
+                else None
+            ),
+        )
+
+    # 5. Duplicates: every version of the parts of changed items
+    if is_computed(context, "duplicate_prime_parts"):
+        touched = {
+            part_base(item) + suffix
+            for item in changed
+            for suffix in ("",) + PART_SUFFIXES
+        }
+        update_part_rows(
+            context["duplicate_prime_parts"],
+            {clean_name(item) for item in touched},
+            warframe_inventory,
+            lambda item: duplicate_count(item, warframe_inventory, part_counts) or None,
+        )
+
+    # 6. Sellable sets are a cheap pass over the set tables, redone when next shown
+    invalidate(context, "sellable_prime_sets")
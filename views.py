@@ -0,0 +1,250 @@
+from fetch import fetch_base_data, fetch_recipe_sets
+from filter import (
+    filter_duplicate_prime_parts,
+    filter_mastered_and_owned_gear,
+    filter_mastered_prime_parts,
+    filter_sellable_prime_sets,
+    filter_unmastered_sentinels_and_companions,
+    filter_unmastered_warframes,
+    filter_unmastered_weapons,
+)
+
+# ----------------------- View Builders -----------------------
+# Each builder fills its context entries in place from the ones it needs.
+
+
+def build_base(context):
+    fetch_base_data(
+        context["warframe_name"],
+        context["archwing_name"],
+        context["weapon_name_category"],
+        context["sentinel_and_companion_name"],
+        context["warframe_inventory"],
+        context["part_counts"],
+    )
+
+
+def build_sets(context):
+    fetch_recipe_sets(
+        context["warframe_name"],
+        context["archwing_name"],
+        context["weapon_name_category"],
+        context["sentinel_and_companion_name"],
+        context["warframe_inventory"],
+        context["part_counts"],
+        context["warframe_parts"],
+        context["archwing_parts"],
+        context["weapon_parts"],
+        context["sentinel_parts"],
+    )
+
+
+def build_mastery(context):
+    filter_mastered_and_owned_gear(
+        context["warframe_name"],
+        context["weapon_name_category"],
+        context["sentinel_and_companion_name"],
+        context["mastered_item_paths"],
+        context["mastered_or_owned_warframes"],
+        context["mastered_or_owned_primaries"],
+        context["mastered_or_owned_secondaries"],
+        context["mastered_or_owned_melees"],
+        context["mastered_or_owned_amps"],
+        context["mastered_or_owned_arch_weapons"],
+        context["mastered_or_owned_sentinels_and_companions"],
+        context["mastered_or_owned_others"],
+    )
+
+
+def build_unmastered_warframes(context):
+    filter_unmastered_warframes(
+        context["warframe_name"],
+        context["mastered_or_owned_warframes"],
+        context["unmastered_warframes"],
+    )
+
+
+def build_unmastered_weapons(context):
+    filter_unmastered_weapons(
+        context["weapon_name_category"],
+        context["mastered_or_owned_primaries"],
+        context["mastered_or_owned_amps"],
+        context["mastered_or_owned_melees"],
+        context["mastered_or_owned_secondaries"],
+        context["mastered_or_owned_arch_weapons"],
+        context["mastered_or_owned_others"],
+        context["unmastered_primaries"],
+        context["unmastered_amps"],
+        context["unmastered_melees"],
+        context["unmastered_secondaries"],
+        context["unmastered_arch_weapons"],
+        context["unmastered_others"],
+    )
+
+
+def build_unmastered_sentinels_and_companions(context):
+    filter_unmastered_sentinels_and_companions(
+        context["sentinel_and_companion_name"],
+        context["mastered_or_owned_sentinels_and_companions"],
+        context["unmastered_sentinels_and_companions"],
+    )
+
+
+def build_mastered_prime_parts(context):
+    filter_mastered_prime_parts(
+        context["warframe_inventory"],
+        context["mastered_or_owned_warframes"],
+        context["mastered_or_owned_primaries"],
+        context["mastered_or_owned_secondaries"],
+        context["mastered_or_owned_melees"],
+        context["mastered_or_owned_amps"],
+        context["mastered_or_owned_arch_weapons"],
+        context["mastered_or_owned_others"],
+        context["mastered_prime_parts"],
+    )
+
+
+def build_duplicate_prime_parts(context):
+    filter_duplicate_prime_parts(
+        context["warframe_inventory"],
+        context["part_counts"],
+        context["duplicate_prime_parts"],
+    )
+
+
+def build_sellable_prime_sets(context):
+    filter_sellable_prime_sets(
+        context["warframe_parts"],
+        context["archwing_parts"],
+        context["weapon_parts"],
+        context["sentinel_parts"],
+        context["mastered_or_owned_warframes"],
+        context["mastered_or_owned_primaries"],
+        context["mastered_or_owned_secondaries"],
+        context["mastered_or_owned_melees"],
+        context["mastered_or_owned_amps"],
+        context["mastered_or_owned_arch_weapons"],
+        context["mastered_or_owned_sentinels_and_companions"],
+        context["sellable_prime_sets"],
+    )
+
+
+# ----------------------- View Definitions -----------------------
+
+# view: (views it needs, context entries it fills, builder)
+VIEWS = {
+    "base": (
+        (),
+        (
+            "warframe_name",
+            "archwing_name",
+            "weapon_name_category",
+            "sentinel_and_companion_name",
+            "warframe_inventory",
+            "part_counts",
+        ),
+        build_base,
+    ),
+    "sets": (
+        ("base",),
+        ("warframe_parts", "archwing_parts", "weapon_parts", "sentinel_parts"),
+        build_sets,
+    ),
+    "mastery": (
+        ("base",),
+        (
+            "mastered_item_paths",
+            "mastered_or_owned_warframes",
+            "mastered_or_owned_primaries",
+            "mastered_or_owned_secondaries",
+            "mastered_or_owned_melees",
+            "mastered_or_owned_amps",
+            "mastered_or_owned_arch_weapons",
+            "mastered_or_owned_sentinels_and_companions",
+            "mastered_or_owned_others",
+        ),
+        build_mastery,
+    ),
+    "unmastered_warframes": (
+        ("mastery",),
+        ("unmastered_warframes",),
+        build_unmastered_warframes,
+    ),
+    "unmastered_weapons": (
+        ("mastery",),
+        (
+            "unmastered_primaries",
+            "unmastered_secondaries",
+            "unmastered_melees",
+            "unmastered_amps",
+            "unmastered_arch_weapons",
+            "unmastered_others",
+        ),
+        build_unmastered_weapons,
+    ),
+    "unmastered_sentinels_and_companions": (
+        ("mastery",),
+        ("unmastered_sentinels_and_companions",),
+        build_unmastered_sentinels_and_companions,
+    ),
+    "mastered_prime_parts": (
+        ("base", "mastery"),
+        ("mastered_prime_parts",),
+        build_mastered_prime_parts,
+    ),
+    "duplicate_prime_parts": (
+        ("base",),
+        ("duplicate_prime_parts",),
+        build_duplicate_prime_parts,
+    ),
+    "sellable_prime_sets": (
+        ("sets", "mastery"),
+        ("sellable_prime_sets",),
+        build_sellable_prime_sets,
+    ),
+}
+
+# The view that fills each context entry
+VIEW_OF = {entry: view for view, (_, entries, _) in VIEWS.items() for entry in entries}
+
+# ----------------------- Lazy Evaluation -----------------------
+
+
+def is_computed(context, view):
+    return view in context["computed_views"]
+
+
+def compute_view(context, view):
+    """Compute a view (and the views it needs) unless it is already up to date"""
+    if is_computed(context, view):
+        return
+
+    needs, entries, build = VIEWS[view]
+    for need in needs:
+        compute_view(context, need)
+
+    for entry in entries:
+        context[entry].clear()
+    build(context)
+    context["computed_views"].add(view)
+
+
+def require(context, *entries):
+    """Make sure the given context entries are computed, e.g. require(context, "weapon_parts")"""
+    for entry in entries:
+        if entry in VIEW_OF:
+            compute_view(context, VIEW_OF[entry])
+
+
+def invalidate(context, *views):
+    """
+    Forget views (all of them if none are given) and every view built on them.
+
+    They are recomputed the next time they are required.
+    """
+    stale = set(views or VIEWS)
+    # Views are defined after the views they need, so one pass finds all dependents
+    for view, (needs, _, _) in VIEWS.items():
+        if stale.intersection(needs):
+            stale.add(view)
+    context["computed_views"] -= stale